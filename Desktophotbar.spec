@@ -1,5 +1,10 @@
 # -*- mode: python ; coding: utf-8 -*-
 import sys
+import os
+import subprocess
+# 打包前生成预缩放精灵图集 assets/sprites.atlas，随 assets 目录一起打入程序包
+subprocess.check_call([sys.executable, os.path.join(SPECPATH, 'build_atlas.py')], cwd=SPECPATH)
+
 binaries_to_include = []
 if sys.platform == 'linux':
     # 将 'lib' 目录下的 so 文件，放到程序包内的 'lib' 目录
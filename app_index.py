@@ -0,0 +1,175 @@
+"""
+XDG 应用索引。
+
+扫描 $XDG_DATA_HOME/applications 与 $XDG_DATA_DIRS/*/applications 下的 .desktop 文件，
+解析结果连同每个文件的 mtime/size 持久化到 ~/.cache/desktophotbar/app_index.json，
+重启或重新扫描时只重新解析发生变化的文件。名称搜索使用前缀表 + 三元组倒排索引。
+本模块不依赖 Qt，由主窗口在后台线程中调用。
+"""
+import os
+import json
+import threading
+from pathlib import Path
+
+import desktop_entry
+
+INDEX_VERSION = 2
+MAX_RESULTS = 30
+
+def application_dirs():
+    """按优先级从高到低返回应用目录，同一 desktop id 以先出现的目录为准。"""
+    data_home = os.environ.get('XDG_DATA_HOME') or str(Path.home() / ".local" / "share")
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or "/usr/local/share:/usr/share"
+    dirs = []
+    for base in [data_home] + data_dirs.split(':'):
+        if not base: continue
+        path = os.path.join(base, 'applications')
+        if path not in dirs: dirs.append(path)
+    return dirs
+
+def desktop_id(path, root=None):
+    """
+    desktop 文件 ID：相对于所在应用目录的路径，'/' 换成 '-'（如 kde4-foo.desktop）。
+    不在任何应用目录下时相对于 root（如拖入的目录），否则取文件名。
+    """
+    path = os.path.abspath(path)
+    for base in application_dirs() + ([root] if root else []):
+        prefix = os.path.abspath(base).rstrip(os.sep) + os.sep
+        if path.startswith(prefix): return path[len(prefix):].replace(os.sep, '-')
+    return os.path.basename(path)
+
+def _short_match(token, word):
+    # 中文等非 ASCII 名称没有空格分词，短查询也按子串匹配
+    return token.startswith(word) or (not token.isascii() and word in token)
+
+def _tokens(text):
+    word, words = [], []
+    for ch in text.lower():
+        if ch.isalnum(): word.append(ch)
+        elif word:
+            words.append(''.join(word))
+            word = []
+    if word: words.append(''.join(word))
+    return words
+
+class ApplicationIndex:
+    def __init__(self, cache_path=None, dirs=None):
+        self.cache_path = Path(cache_path) if cache_path else Path.home() / ".cache" / "desktophotbar" / "app_index.json"
+        self.dirs = dirs if dirs is not None else application_dirs()
+        self._lock = threading.Lock()
+        self._files = {}
+        self._apps = []
+        self._prefix = {}
+        self._trigrams = {}
+        self.parsed = 0
+
+    def load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                with self._lock: self._files = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+        self._rebuild()
+
+    def save(self):
+        with self._lock:
+            content = json.dumps({'version': INDEX_VERSION, 'files': self._files}, ensure_ascii=False)
+        tmp_path = self.cache_path.with_name(f".{self.cache_path.name}.{os.getpid()}.tmp")
+        try:
+            os.makedirs(self.cache_path.parent, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f: f.write(content)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e: print(f"Error saving application index: {e}")
+
+    def rescan(self, dirs=None):
+        """重新扫描 dirs（默认全部目录），只解析 mtime/size 变化的文件。返回索引是否发生变化。"""
+        dirs = [d for d in (dirs or self.dirs) if d in self.dirs]
+        with self._lock: files = dict(self._files)
+        changed = False
+        for app_dir in dirs:
+            seen = set()
+            for root, _, names in os.walk(app_dir):
+                for name in names:
+                    if not name.endswith('.desktop'): continue
+                    path = os.path.join(root, name)
+                    try: st = os.stat(path)
+                    except OSError: continue
+                    seen.add(path)
+                    old = files.get(path)
+                    if old and old['mtime_ns'] == st.st_mtime_ns and old['size'] == st.st_size: continue
+                    try: info = desktop_entry.parse_file(path)
+                    except OSError: continue
+                    self.parsed += 1
+                    files[path] = {'mtime_ns': st.st_mtime_ns, 'size': st.st_size,
+                                   'id': os.path.relpath(path, app_dir).replace(os.sep, '-'),
+                                   'dir': app_dir, 'info': info}
+                    changed = True
+            prefix = app_dir.rstrip(os.sep) + os.sep
+            for path in [p for p in files if p.startswith(prefix) and p not in seen]:
+                del files[path]
+                changed = True
+        if changed:
+            with self._lock: self._files = files
+            self._rebuild()
+        return changed
+
+    def _rebuild(self):
+        with self._lock: files = dict(self._files)
+        dir_rank = {d: i for i, d in enumerate(self.dirs)}
+        by_id = {}
+        for path, entry in files.items():
+            info = entry['info']
+            if info.get('type', 'Application') != 'Application': continue
+            rank = dir_rank.get(entry['dir'], len(self.dirs))
+            current = by_id.get(entry['id'])
+            if current is None or rank < current[0]: by_id[entry['id']] = (rank, path, info)
+        apps, prefix_index, trigram_index = [], {}, {}
+        for _, path, info in sorted(by_id.values(), key=lambda item: item[2].get('name', '').lower()):
+            # NoDisplay/Hidden 的条目同样遮蔽低优先级目录中的同名条目，但不出现在结果中
+            if info.get('no_display') or not desktop_entry.is_available(info) or not info.get('exec') or not info.get('name'): continue
+            app_id = len(apps)
+            apps.append({'name': info['name'], 'icon': info.get('icon', ''), 'exec': info['exec'], 'path': path})
+            exec_name = os.path.basename(info['exec'].split()[0]) if info['exec'].split() else ''
+            for token in set(_tokens(info['name']) + _tokens(exec_name)):
+                starts = range(len(token)) if not token.isascii() else (0,)
+                for start in starts:
+                    for length in (1, 2):
+                        if len(token) - start >= length: prefix_index.setdefault(token[start:start + length], set()).add(app_id)
+                for i in range(len(token) - 2):
+                    trigram_index.setdefault(token[i:i + 3], set()).add(app_id)
+        with self._lock:
+            self._apps, self._prefix, self._trigrams = apps, prefix_index, trigram_index
+
+    def search(self, query, limit=MAX_RESULTS):
+        words = _tokens(query)
+        with self._lock: apps, prefix_index, trigram_index = self._apps, self._prefix, self._trigrams
+        if not words: return []
+        candidates = None
+        for word in words:
+            if len(word) < 3: ids = prefix_index.get(word, set())
+            else:
+                ids = None
+                for i in range(len(word) - 2):
+                    postings = trigram_index.get(word[i:i + 3], set())
+                    ids = postings if ids is None else ids & postings
+                    if not ids: break
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates: return []
+        query = query.strip().lower()
+        results = []
+        for app_id in candidates:
+            app = apps[app_id]
+            name = app['name'].lower()
+            haystack = _tokens(app['name']) + _tokens(os.path.basename(app['exec'].split()[0]))
+            if not all(any(_short_match(token, w) if len(w) < 3 else w in token for token in haystack) for w in words): continue
+            if name.startswith(query): rank = 0
+            elif any(token.startswith(words[0]) for token in haystack): rank = 1
+            else: rank = 2
+            results.append((rank, name, app_id))
+        results.sort()
+        return [apps[app_id] for _, _, app_id in results[:limit]]
+
+    def __len__(self):
+        return len(self._apps)
@@ -0,0 +1,419 @@
+"""
+物品栏热点路径基准。
+
+在 QT_QPA_PLATFORM=offscreen 下运行，使用临时目录中生成的图标主题、.desktop 文件和桩程序，
+不读写真实的配置和缓存。覆盖：
+    - 每个 SCALE_PRESETS 缩放比例下的 updateLayout
+    - 合成鼠标移动事件流下 mouseMoveEvent 的命中测试
+    - 两种渲染模式下悬停切换引起的重绘
+    - 相邻页已预取时的翻页
+    - 空格子/有应用的格子上从右键到菜单第一次绘制完成（首次创建与复用缓存的菜单）
+    - getBestIcon 冷/热查找，IconLookup 首次加载主题与哈希查找，以及 IconCache 的未命中/磁盘命中/内存命中
+    - 大量格子时 ConfigManager 的 save/load
+    - parseDesktopFile 吞吐
+    - launchApp 启动桩程序的延迟
+
+结果以 JSON 输出，并与保存的基线比较，中位数变慢超过阈值时以退出码 1 结束。
+
+用法:
+    python benchmarks/bench_hotbar.py [--quick] [--only 关键字] [--json results.json]
+                                      [--baseline benchmarks/baseline.json] [--save-baseline] [--threshold 0.25]
+"""
+import sys
+import os
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+THEME_NAME = 'BenchTheme'
+ICON_COUNT = 64
+DESKTOP_COUNT = 300
+SLOT_PAYLOAD = 1000
+
+DESKTOP_TEMPLATE = """[Desktop Entry]
+Type=Application
+Name=Bench App {index}
+Name[zh_CN]=基准应用 {index}
+GenericName=Benchmark Fixture
+Comment=Fixture entry number {index} used by the benchmark suite
+Comment[zh_CN]=基准测试用的第 {index} 个条目
+Icon=bench-icon-{icon}
+Exec={stub} --instance {index} %U
+Terminal=false
+Categories=Utility;Development;
+Keywords=bench;fixture;hotbar;
+MimeType=text/plain;image/png;
+
+[Desktop Action new-window]
+Name=New Window
+Exec={stub} --new-window
+"""
+
+def create_fixtures(base):
+    """生成临时的 HOME、XDG 数据目录、图标主题、.desktop 文件和桩程序。"""
+    home = os.path.join(base, 'home')
+    share = os.path.join(base, 'share')
+    os.makedirs(home)
+    stub = os.path.join(base, 'bench-stub')
+    with open(stub, 'w') as f: f.write("#!/bin/sh\nexit 0\n")
+    os.chmod(stub, 0o755)
+    applications = os.path.join(share, 'applications')
+    os.makedirs(applications)
+    for index in range(DESKTOP_COUNT):
+        with open(os.path.join(applications, f'bench-{index}.desktop'), 'w', encoding='utf-8') as f:
+            f.write(DESKTOP_TEMPLATE.format(index=index, icon=index % ICON_COUNT, stub=stub))
+    os.environ['HOME'] = home
+    os.environ['XDG_DATA_HOME'] = os.path.join(home, '.local', 'share')
+    os.environ['XDG_DATA_DIRS'] = share
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return share, applications, stub
+
+def create_icon_theme(share):
+    # QImage 保存 PNG 需要先创建 QApplication，因此在导入 PyQt5 之后调用
+    from PyQt5.QtGui import QImage, QColor
+    theme_dir = os.path.join(share, 'icons', THEME_NAME)
+    sizes = (16, 32, 48, 128)
+    os.makedirs(theme_dir, exist_ok=True)
+    with open(os.path.join(theme_dir, 'index.theme'), 'w') as f:
+        f.write(f"[Icon Theme]\nName={THEME_NAME}\nDirectories={','.join(f'{s}x{s}/apps' for s in sizes)}\n")
+        for s in sizes: f.write(f"\n[{s}x{s}/apps]\nSize={s}\nType=Fixed\n")
+    for s in sizes:
+        apps_dir = os.path.join(theme_dir, f'{s}x{s}', 'apps')
+        os.makedirs(apps_dir)
+        for index in range(ICON_COUNT):
+            image = QImage(s, s, QImage.Format_ARGB32)
+            image.fill(QColor.fromHsv(index * 360 // ICON_COUNT, 200, 220))
+            image.save(os.path.join(apps_dir, f'bench-icon-{index}.png'))
+    # 有 gtk-update-icon-cache 时生成 icon-theme.cache，测量的是 mmap 缓存路径，否则是自建索引路径
+    if shutil.which('gtk-update-icon-cache'):
+        subprocess.run(['gtk-update-icon-cache', '-f', '-q', theme_dir], check=False)
+    return os.path.join(share, 'icons')
+
+def summarize(samples, unit_count=1):
+    """samples 为每次运行的秒数；unit_count 为每次运行处理的单位数，用于换算单位耗时。"""
+    samples = sorted(s / unit_count for s in samples)
+    n = len(samples)
+    return {
+        'runs': n,
+        'median_ms': samples[n // 2] * 1000,
+        'p95_ms': samples[min(n - 1, int(n * 0.95))] * 1000,
+        'mean_ms': sum(samples) / n * 1000,
+        'min_ms': samples[0] * 1000,
+    }
+
+def timed(fn, runs, before=None, after=None):
+    samples = []
+    for _ in range(runs):
+        if before: before()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        if after: after()
+    return samples
+
+class Suite:
+    def __init__(self, args, fixtures):
+        self.args = args
+        self.share, self.applications, self.stub = fixtures
+        self.results = {}
+        self.runs = 5 if args.quick else 20
+
+    def wanted(self, name):
+        return not self.args.only or any(word in name for word in self.args.only)
+
+    def record(self, name, samples, unit_count=1, **extra):
+        result = summarize(samples, unit_count)
+        result.update(extra)
+        self.results[name] = result
+        print(f"{name:<36} 中位数 {result['median_ms']:9.4f} ms  p95 {result['p95_ms']:9.4f} ms", file=sys.stderr)
+
+    def run(self):
+        from PyQt5.QtWidgets import QApplication
+        from PyQt5.QtGui import QIcon
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        QIcon.setThemeSearchPaths([create_icon_theme(self.share)])
+        QIcon.setThemeName(THEME_NAME)
+        sys.path.insert(0, ROOT)
+        import main
+        self.main = main
+        self.window = main.HotbarWindow()
+        self.window.icons_ready = True
+        self.fillSlots()
+        # getBestIcon 放在最前面，避免主题查找先被布局时的图标渲染预热
+        for bench in (self.benchGetBestIcon, self.benchIconLookup, self.benchUpdateLayout, self.benchMouseMove, self.benchHoverRepaint,
+                      self.benchSetPage, self.benchContextMenu, self.benchIconCache,
+                      self.benchConfig, self.benchParseDesktopFile, self.benchLaunchApp):
+            bench()
+        self.window.config_manager.flush()
+        return self.results
+
+    def settle(self):
+        # 等后台线程把请求的图标都解码完，并处理完回到 GUI 线程的结果
+        while self.window.icon_loader.pending:
+            self.app.processEvents()
+            time.sleep(0.0005)
+        self.app.processEvents()
+
+    def fillSlots(self):
+        # 每页使用不同的图标，翻页时才能体现出预取的效果
+        for page_index, page in enumerate(self.window.pages):
+            for slot_index in range(len(page)):
+                index = page_index * len(page) + slot_index
+                path = os.path.join(self.applications, f'bench-{index % DESKTOP_COUNT}.desktop')
+                page[slot_index] = {'name': f'Bench App {index}', 'icon': f'bench-icon-{index % ICON_COUNT}',
+                                    'exec': f'{self.stub} --instance {index} %U', 'path': path}
+
+    def benchUpdateLayout(self):
+        from dialogs import GeneralSettingsDialog
+        window = self.window
+        for scale in GeneralSettingsDialog.SCALE_PRESETS:
+            name = f'updateLayout@{scale:g}x'
+            if not self.wanted(name): continue
+            window.settings['scale'] = scale
+            window.updateLayout()  # 预热：精灵与图标进入缓存，之后测量的是缓存命中时的布局耗时
+            self.settle()
+            self.record(name, timed(window.updateLayout, self.runs))
+        window.settings['scale'] = 3.0
+        window.updateLayout()
+
+    def benchMouseMove(self):
+        if not self.wanted('mouseMoveEvent'): return
+        from PyQt5.QtCore import Qt, QEvent, QPointF
+        from PyQt5.QtGui import QMouseEvent
+        window = self.window
+        window.updateLayout()
+        width, height = window.width(), window.height()
+        events = []
+        count = 2000 if self.args.quick else 20000
+        for i in range(count):
+            # 来回横扫整个物品栏，纵向缓慢漂移，偶尔移出窗口
+            x = (i * 7) % (2 * width) - width // 2
+            y = (i // 50) % (height + 10) - 5
+            local = QPointF(x, y)
+            events.append(QMouseEvent(QEvent.MouseMove, local, QPointF(window.mapToGlobal(local.toPoint())),
+                                      Qt.NoButton, Qt.NoButton, Qt.NoModifier))
+        def stream():
+            for event in events: window.mouseMoveEvent(event)
+        self.record('mouseMoveEvent', timed(stream, max(3, self.runs // 4)), unit_count=count, events=count)
+        window.leaveEvent(None)
+
+    def benchHoverRepaint(self):
+        window = self.window
+        window.show()
+        for renderer in ('widgets', 'painted'):
+            for scale in (3.0, 7.5, 10.0):
+                name = f'hoverRepaint.{renderer}@{scale:g}x'
+                if not self.wanted(name): continue
+                window.applyGeneralSettings({'renderer': renderer, 'scale': scale})
+                self.settle()
+                count = len(window.slots[:window.grid.count])
+                def sweep():
+                    # 逐格移动选中框，每次都处理完挂起的重绘
+                    for index in range(count):
+                        window.updateHover(index)
+                        self.app.processEvents()
+                self.record(name, timed(sweep, self.runs), unit_count=count)
+        window.hide()
+        window.applyGeneralSettings({'renderer': 'widgets', 'scale': 3.0})
+
+    def benchSetPage(self):
+        if not self.wanted('setPage'): return
+        window = self.window
+        # 等相邻页在后台预取完，再测下一次翻页
+        self.settle()
+        self.record('setPage', timed(lambda: window.setPage(window.current_page + 1), self.runs, after=self.settle))
+        window.setPage(0)
+        self.settle()
+
+    def benchContextMenu(self):
+        from PyQt5.QtCore import QTimer
+        from PyQt5.QtWidgets import QApplication
+        import instrumentation
+        window = self.window
+        window.show()
+        self.app.processEvents()
+        instrumentation.configure(True)
+        saved, window.slots[8] = window.slots[8], None
+        position = window.mapToGlobal(window.rect().center())
+        def close_popup():
+            popup = QApplication.activePopupWidget()
+            if popup: popup.close()
+        for state, slot_index in (('filled', 0), ('empty', 8)):
+            name = f'showContextMenu.{state}'
+            if not self.wanted(name): continue
+            # 菜单绘制完成、计时记录之后再关闭；耗时取菜单自己记录的右键到首次绘制
+            instrumentation.histograms.pop('showContextMenu', None)
+            for _ in range(self.runs + 1):
+                QTimer.singleShot(30, close_popup)
+                window.showContextMenu(position, slot_index)
+            histogram = instrumentation.histograms['showContextMenu']
+            samples = [ns / 1e9 for ns in histogram.samples[:histogram.count]]
+            self.record(name, samples[1:], first_ms=samples[0] * 1000)
+        window.slots[8] = saved
+        instrumentation.configure(window.settings.get('instrumentation', False))
+        window.hide()
+
+    def benchGetBestIcon(self):
+        window = self.window
+        if self.wanted('getBestIcon.cold'):
+            # Qt 会缓存主题查找结果，每个图标名只有第一次查找是冷的
+            names = iter([f'bench-icon-{i}' for i in range(ICON_COUNT)])
+            self.record('getBestIcon.cold', timed(lambda: window.getBestIcon(next(names)), ICON_COUNT))
+        if self.wanted('getBestIcon.warm'):
+            names = [f'bench-icon-{i}' for i in range(ICON_COUNT)]
+            self.record('getBestIcon.warm', timed(lambda: [window.getBestIcon(n) for n in names], self.runs),
+                        unit_count=ICON_COUNT)
+        if self.wanted('getBestIcon.missing'):
+            self.record('getBestIcon.missing', timed(lambda: window.getBestIcon('bench-no-such-icon'), self.runs))
+
+    def benchIconLookup(self):
+        from PyQt5.QtGui import QIcon
+        from icon_theme import IconLookup
+        paths = QIcon.themeSearchPaths()
+        if self.wanted('IconLookup.cold'):
+            # 每次新建查找器：读取 index.theme、映射缓存或扫描目录建立索引，再查找一个图标
+            self.record('IconLookup.cold', timed(lambda: IconLookup(THEME_NAME, paths).lookup('bench-icon-0', 48), self.runs))
+        lookup = IconLookup(THEME_NAME, paths)
+        names = [f'bench-icon-{i}' for i in range(ICON_COUNT)]
+        if self.wanted('IconLookup.first'):
+            sizes = iter(range(1000, 1000 + self.runs))
+            # 每轮换一个尺寸，绕过查找结果的记忆，测的是哈希查找加尺寸匹配
+            self.record('IconLookup.first', timed(lambda: [lookup.lookup(n, next(sizes)) for n in names[:1]], self.runs))
+        if self.wanted('IconLookup.warm'):
+            self.record('IconLookup.warm', timed(lambda: [lookup.lookup(n, 48) for n in names], self.runs), unit_count=ICON_COUNT)
+
+    def benchIconCache(self):
+        window = self.window
+        cache_dir = tempfile.mkdtemp(prefix='icon-cache-', dir=os.environ['HOME'])
+        cache = self.main.IconCache(cache_dir)
+        names = [f'bench-icon-{i}' for i in range(ICON_COUNT)]
+        size = 48
+        if self.wanted('IconCache.miss'):
+            self.record('IconCache.miss', timed(lambda: [cache.pixmap(n, size, window.getBestIcon) for n in names], 1),
+                        unit_count=ICON_COUNT)
+        else:
+            for n in names: cache.pixmap(n, size, window.getBestIcon)
+        if self.wanted('IconCache.disk'):
+            self.record('IconCache.disk', timed(lambda: [cache.pixmap(n, size, window.getBestIcon) for n in names],
+                                                self.runs, before=cache.clear), unit_count=ICON_COUNT)
+        if self.wanted('IconCache.memory'):
+            self.record('IconCache.memory', timed(lambda: [cache.pixmap(n, size, window.getBestIcon) for n in names],
+                                                  self.runs), unit_count=ICON_COUNT)
+
+    def benchConfig(self):
+        manager = self.main.ConfigManager(write_behind=False)
+        slots = [{'name': f'Bench App {i}', 'icon': f'bench-icon-{i % ICON_COUNT}',
+                  'exec': f'{self.stub} --instance {i} %U', 'working_dir': '', 'terminal': False,
+                  'path': os.path.join(self.applications, f'bench-{i}.desktop')} for i in range(SLOT_PAYLOAD)]
+        data = {'settings': dict(self.window.settings), 'slots': slots}
+        counter = iter(range(10 ** 9))
+        def changed_save():
+            # 每次修改一个字段，避免被内容哈希去重跳过
+            data['settings']['window_position'] = {'x': next(counter), 'y': 0}
+            manager.save(data)
+        if self.wanted('ConfigManager.save'):
+            self.record('ConfigManager.save', timed(changed_save, self.runs), slots=SLOT_PAYLOAD)
+        else: changed_save()
+        if self.wanted('ConfigManager.save.unchanged'):
+            self.record('ConfigManager.save.unchanged', timed(lambda: manager.save(data), self.runs), slots=SLOT_PAYLOAD)
+        if self.wanted('ConfigManager.save.write_behind'):
+            behind = self.main.ConfigManager(write_behind=True, delay=60.0)
+            def queued_save():
+                data['settings']['window_position'] = {'x': next(counter), 'y': 0}
+                behind.save(data)
+            self.record('ConfigManager.save.write_behind', timed(queued_save, self.runs), slots=SLOT_PAYLOAD)
+            behind.flush()
+        if self.wanted('ConfigManager.load'):
+            self.record('ConfigManager.load', timed(manager.load, self.runs), slots=SLOT_PAYLOAD)
+
+    def benchParseDesktopFile(self):
+        if not self.wanted('parseDesktopFile'): return
+        contents = []
+        for name in sorted(os.listdir(self.applications)):
+            with open(os.path.join(self.applications, name), 'r', encoding='utf-8') as f: contents.append(f.read())
+        window = self.window
+        def parse_all():
+            for content in contents: window.parseDesktopFile(content)
+        samples = timed(parse_all, self.runs)
+        self.record('parseDesktopFile', samples, unit_count=len(contents), files=len(contents),
+                    files_per_second=len(contents) / sorted(samples)[len(samples) // 2])
+
+    def benchLaunchApp(self):
+        if not self.wanted('launchApp'): return
+        window = self.window
+        runs = 20 if self.args.quick else 100
+        def reap():
+            # 等待桩程序退出并由 SIGCHLD 通知回收，不计入启动耗时
+            deadline = time.monotonic() + 2.0
+            while window.child_supervisor.running.get(window.slotKey(0)) and time.monotonic() < deadline:
+                self.app.processEvents()
+                time.sleep(0.001)
+        self.record('launchApp', timed(lambda: window.launchApp(0), runs, after=reap))
+
+def compare(results, baseline, threshold):
+    """返回中位数变慢超过阈值的基准列表。"""
+    regressions = []
+    print(f"\n{'基准':<36} {'基线 ms':>10} {'当前 ms':>10} {'变化':>8}", file=sys.stderr)
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if not base: continue
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            regressions.append(name)
+            flag = '  退化'
+        print(f"{name:<36} {base['median_ms']:10.4f} {result['median_ms']:10.4f} {(ratio - 1) * 100:+7.1f}%{flag}", file=sys.stderr)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help="减少运行次数，用于快速检查")
+    parser.add_argument('--only', action='append', help="只运行名称中包含该关键字的基准，可重复")
+    parser.add_argument('--json', help="把结果写入该文件（默认输出到 stdout）")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="用于比较的基线文件")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--threshold', type=float, default=0.25, help="中位数变慢超过该比例视为退化")
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix='desktophotbar-bench-')
+    try:
+        fixtures = create_fixtures(base)
+        results = Suite(args, fixtures).run()
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        'version': 1,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'quick': args.quick,
+        'results': results,
+    }
+    content = json.dumps(report, indent=4, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f: f.write(content + '\n')
+    else: print(content)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f: f.write(content + '\n')
+        print(f"已保存基线: {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"没有基线文件 {args.baseline}，跳过比较（可用 --save-baseline 生成）", file=sys.stderr)
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as f: baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} 项基准变慢超过 {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
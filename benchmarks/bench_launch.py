@@ -0,0 +1,51 @@
+"""
+启动延迟基准：比较经由预先 fork 的启动辅助进程与在主进程中直接 posix_spawn 的耗时。
+
+主进程在 fork 出辅助进程之后再导入 PyQt5、创建 QApplication 并分配 --inflate 指定大小的内存，
+模拟长时间运行、RSS 较大的物品栏进程。
+
+用法:
+    python benchmarks/bench_launch.py [--runs 200] [--inflate 200]
+"""
+import sys
+import os
+import argparse
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import launcher
+
+def measure(label, spawn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        pid = spawn()
+        samples.append(time.perf_counter() - start)
+        if label == 'direct': os.waitpid(pid, 0)
+    samples.sort()
+    print(f"{label:<8} 中位数 {samples[len(samples) // 2] * 1000:7.3f} ms  "
+          f"p95 {samples[int(len(samples) * 0.95)] * 1000:7.3f} ms  最大 {samples[-1] * 1000:7.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=200)
+    parser.add_argument('--inflate', type=int, default=200, help="主进程额外占用的内存 (MB)")
+    args = parser.parse_args()
+
+    helper = launcher.start_helper()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv)
+    ballast = bytearray(args.inflate * 1024 * 1024)
+    for offset in range(0, len(ballast), 4096): ballast[offset] = 1
+
+    argv, cwd, env = ['true'], os.getcwd(), launcher.child_environment()
+    measure('direct', lambda: launcher.spawn(argv, cwd, env), args.runs)
+    if helper is None:
+        print("启动辅助进程不可用")
+        return
+    measure('helper', lambda: helper.spawn(argv, cwd, env), args.runs)
+    launcher.stop_helper()
+
+if __name__ == '__main__':
+    main()
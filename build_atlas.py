@@ -0,0 +1,69 @@
+"""
+构建时生成精灵图集 assets/sprites.atlas。
+
+把 hotbar.png / hotbar_selection.png 按总设置中的每个预设缩放比例预先缩放好，
+以原始 ARGB32 像素连续写入一个文件，运行时由 SpriteAtlas 内存映射后直接切片使用。
+
+用法: python build_atlas.py [输出路径]
+"""
+import sys
+import os
+import json
+import struct
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+
+from dialogs import GeneralSettingsDialog
+from main import SpriteAtlas, SPRITE_BASE_SIZES, scaledSpriteSize
+
+ALIGNMENT = 64
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+def align(value):
+    return (value + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def build(output_path=None):
+    output_path = output_path or os.path.join(ASSETS_DIR, 'sprites.atlas')
+    image_format = QImage.Format_ARGB32_Premultiplied
+    sprites, blobs, sources = [], [], {}
+    for name in SPRITE_BASE_SIZES:
+        file_name = f'{name}.png'
+        source_path = os.path.join(ASSETS_DIR, file_name)
+        source = QImage(source_path)
+        if source.isNull():
+            raise SystemExit(f"无法读取精灵源文件: {source_path}")
+        source = source.convertToFormat(image_format)
+        sources[file_name] = os.stat(source_path).st_mtime_ns
+        seen = set()
+        for scale in GeneralSettingsDialog.SCALE_PRESETS:
+            width, height = scaledSpriteSize(name, scale)
+            if (width, height) in seen or width <= 0 or height <= 0: continue
+            seen.add((width, height))
+            scaled = source.scaled(width, height, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            sprites.append({'name': name, 'width': width, 'height': height, 'stride': scaled.bytesPerLine()})
+            blobs.append(scaled.constBits().asstring(scaled.byteCount()))
+
+    # 头部长度依赖偏移量的位数，先用占位偏移估算，再据此定下数据区起点
+    header = {'format': int(image_format), 'sources': sources, 'sprites': sprites}
+    for sprite in sprites: sprite['offset'] = 0
+    data_start = align(12 + len(json.dumps(header).encode('utf-8')) + 16 * len(sprites))
+    offset = data_start
+    for sprite, blob in zip(sprites, blobs):
+        sprite['offset'] = offset
+        offset = align(offset + len(blob))
+    header_bytes = json.dumps(header).encode('utf-8')
+    assert 12 + len(header_bytes) <= data_start
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(SpriteAtlas.MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes)
+        for sprite, blob in zip(sprites, blobs):
+            f.write(b'\0' * (sprite['offset'] - f.tell()))
+            f.write(blob)
+    os.replace(tmp_path, output_path)
+    print(f"已生成 {output_path}: {len(sprites)} 个精灵, {os.path.getsize(output_path)} 字节")
+    return output_path
+
+if __name__ == '__main__':
+    build(sys.argv[1] if len(sys.argv) > 1 else None)
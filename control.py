@@ -0,0 +1,169 @@
+"""
+单实例控制。
+
+第一个启动的物品栏在 $XDG_RUNTIME_DIR/desktophotbar.sock（没有时为 /tmp 下属于当前用户、权限 0700 的目录）上监听，
+只信任属于当前用户的 socket 文件。之后的命令行调用
+（main.py launch 3、reload、page 2、stats 等）只连接这个 socket 发送命令后退出，不导入 PyQt5，
+绑定到快捷键的启动只需一次本地往返。不带命令再次运行时，同样交给已运行的实例显示窗口。
+
+协议为一行 JSON：请求 {"command": ..., "args": [...]}，应答 {"ok": true, "result": ...}
+或 {"ok": false, "error": ...}。本模块不依赖 Qt，监听端由主程序的事件循环驱动。
+"""
+import os
+import sys
+import json
+import stat
+import errno
+import socket
+
+SOCKET_NAME = 'desktophotbar.sock'
+CLIENT_TIMEOUT = 2.0
+MAX_REQUEST = 64 * 1024
+# 命令 -> (参数个数, 说明)
+COMMANDS = {
+    'launch': (1, "启动当前页的第 N 个格子 (从 1 开始)"),
+    'page': (1, "切换到第 N 页 (从 1 开始)"),
+    'reload': (0, "重新读取 config.json"),
+    'stats': (0, "输出缓存、启动耗时等统计信息 (JSON)"),
+    'show': (0, "显示并激活物品栏窗口"),
+    'quit': (0, "退出物品栏"),
+}
+
+class AlreadyRunning(Exception):
+    pass
+
+# 本进程绑定的 socket 文件 -> (st_dev, st_ino)，退出时只删除仍属于自己的文件
+_bound = {}
+
+def _xdg_runtime_dir():
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    return runtime_dir if runtime_dir and os.path.isdir(runtime_dir) else None
+
+def socket_path():
+    return os.path.join(_xdg_runtime_dir() or os.path.join('/tmp', f'desktophotbar-{os.getuid()}'), SOCKET_NAME)
+
+def _ensure_private_dir(directory):
+    # /tmp 下的路径可以被别人抢先创建，必须是当前用户所有、其他人无权访问的真实目录
+    try: os.mkdir(directory, 0o700)
+    except FileExistsError: pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+        raise OSError(errno.EPERM, "目录不属于当前用户或权限过宽", directory)
+
+def _check_socket(path):
+    """不是 socket 或不属于当前用户的文件既不连接也不删除；文件不存在时抛出 FileNotFoundError。"""
+    st = os.lstat(path)
+    if not stat.S_ISSOCK(st.st_mode) or st.st_uid != os.getuid():
+        raise OSError(errno.EPERM, "控制 socket 不属于当前用户", path)
+
+def send(command, args=(), path=None):
+    """把命令发给正在运行的实例并返回应答；没有实例在监听时抛出 OSError。"""
+    request = json.dumps({'command': command, 'args': list(args)}, ensure_ascii=False).encode('utf-8') + b'\n'
+    path = path or socket_path()
+    _check_socket(path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CLIENT_TIMEOUT)
+        sock.connect(path)
+        sock.sendall(request)
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk: break
+            chunks.append(chunk)
+    try: return json.loads(b''.join(chunks).decode('utf-8'))
+    except ValueError: raise OSError("物品栏返回了无法解析的应答")
+
+def usage():
+    lines = ["用法: main.py [命令] [参数]", "", "不带命令时启动物品栏，已有实例在运行时改为显示它的窗口。", "", "命令:"]
+    for name, (argc, help_text) in COMMANDS.items():
+        lines.append(f"  {name + (' N' if argc else ''):<10} {help_text}")
+    return '\n'.join(lines)
+
+def run_cli(argv):
+    """
+    处理命令行。带命令时转发给正在运行的实例并返回退出码；不带命令时尝试让已有实例显示窗口，
+    成功返回 0，没有已运行的实例时返回 None，由调用方继续启动图形界面。以 -- 开头的选项，以及第一个词不是命令的
+    参数（如 Qt 的 -platform offscreen）都留给图形界面处理。
+    """
+    words = [arg for arg in argv if not arg.startswith('--')]
+    if not words:
+        try: send('show')
+        except OSError: return None
+        return 0
+    command, args = words[0], words[1:]
+    if command not in COMMANDS and command not in ('help', '-h'): return None
+    if command in ('help', '-h') or len(args) != COMMANDS[command][0]:
+        print(usage(), file=sys.stderr)
+        return 0 if command in ('help', '-h') else 2
+    try: reply = send(command, args)
+    except OSError as e:
+        print(f"无法连接到正在运行的物品栏 ({socket_path()}): {e}", file=sys.stderr)
+        return 1
+    if not reply.get('ok'):
+        print(f"错误: {reply.get('error')}", file=sys.stderr)
+        return 1
+    result = reply.get('result')
+    if result is not None:
+        print(result if isinstance(result, str) else json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+def listen(path=None):
+    """
+    绑定并监听控制 socket，返回非阻塞的监听 socket，出错时返回 None。已有实例在监听时抛出 AlreadyRunning；
+    上次异常退出留下的 socket 文件连接不上，确认属于当前用户后删除并重新绑定。
+    """
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        if path is None:
+            path = socket_path()
+            if not _xdg_runtime_dir(): _ensure_private_dir(os.path.dirname(path))
+        try: _bind(server, path)
+        except OSError:
+            _check_socket(path)
+            try: send('ping', path=path)
+            except OSError: pass
+            else:
+                server.close()
+                raise AlreadyRunning(path)
+            os.unlink(path)
+            _bind(server, path)
+        st = os.stat(path)
+        _bound[path] = (st.st_dev, st.st_ino)
+        server.listen(8)
+        server.setblocking(False)
+        return server
+    except OSError as e:
+        print(f"Error creating control socket: {e}")
+        server.close()
+        return None
+
+def _bind(server, path):
+    # socket 文件一创建就只有当前用户可访问，不留 bind 与 chmod 之间的空档；启动早期调用，此时还没有其他线程
+    previous = os.umask(0o177)
+    try: server.bind(path)
+    finally: os.umask(previous)
+
+def close(server):
+    """关闭监听 socket，socket 文件仍属于本实例时才删除。"""
+    path = server.getsockname()
+    server.close()
+    try:
+        st = os.stat(path)
+        if _bound.pop(path, None) == (st.st_dev, st.st_ino): os.unlink(path)
+    except OSError: pass
+
+def handle_request(data, handler):
+    """解析一条请求并交给 handler(command, args)，返回应答的字节串。ping 由本模块直接应答。"""
+    try:
+        request = json.loads(data.decode('utf-8'))
+        command, args = request['command'], [str(arg) for arg in request.get('args', [])]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        reply = {'ok': False, 'error': "无法解析的请求"}
+    else:
+        if command == 'ping': reply = {'ok': True, 'result': os.getpid()}
+        elif command not in COMMANDS: reply = {'ok': False, 'error': f"未知命令: {command}"}
+        else:
+            try: reply = {'ok': True, 'result': handler(command, args)}
+            except Exception as e: reply = {'ok': False, 'error': str(e)}
+    return json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n'
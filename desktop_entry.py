@@ -0,0 +1,138 @@
+"""
+Desktop Entry 解析。
+
+按 freedesktop Desktop Entry 规范流式读取 .desktop 文件：只解析 [Desktop Entry] 段（读到下一个段头即停止），
+处理转义字符和 Name[zh_CN] 这类本地化键，并按 (路径, mtime, size) 缓存解析结果，
+启动应用前只需一次 stat 即可确认缓存是否仍然有效。本模块不依赖 Qt。
+"""
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+ENTRY_GROUP = 'Desktop Entry'
+CACHE_CAPACITY = 512
+
+_ESCAPES = {'s': ' ', 'n': '\n', 't': '\t', 'r': '\r', '\\': '\\'}
+_BOOLEAN_KEYS = {'NoDisplay': 'no_display', 'Hidden': 'hidden', 'Terminal': 'terminal'}
+_STRING_KEYS = {'Name': 'name', 'GenericName': 'generic_name', 'Icon': 'icon', 'Exec': 'exec',
+                'TryExec': 'try_exec', 'Path': 'working_dir', 'Type': 'type'}
+_APP_INFO_KEYS = frozenset(_STRING_KEYS) | frozenset(_BOOLEAN_KEYS)
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+cache_hits = 0
+cache_misses = 0
+
+def locale_candidates(locale=None):
+    """按规范的匹配顺序返回本地化后缀，如 zh_CN.UTF-8 -> ['zh_CN', 'zh']。"""
+    if locale is None:
+        locale = os.environ.get('LC_ALL') or os.environ.get('LC_MESSAGES') or os.environ.get('LANG') or ''
+    locale = locale.split(':')[0]
+    if not locale or locale in ('C', 'POSIX'): return []
+    modifier = None
+    if '@' in locale: locale, modifier = locale.split('@', 1)
+    locale = locale.split('.', 1)[0]
+    lang, _, country = locale.partition('_')
+    candidates = []
+    if country and modifier: candidates.append(f'{lang}_{country}@{modifier}')
+    if country: candidates.append(f'{lang}_{country}')
+    if modifier: candidates.append(f'{lang}@{modifier}')
+    candidates.append(lang)
+    return candidates
+
+def unescape(value):
+    if '\\' not in value: return value
+    out, i = [], 0
+    while i < len(value):
+        ch = value[i]
+        if ch == '\\' and i + 1 < len(value):
+            out.append(_ESCAPES.get(value[i + 1], '\\' + value[i + 1]))
+            i += 2
+        else:
+            out.append(ch)
+            i += 1
+    return ''.join(out)
+
+def parse_lines(lines, locale=None, keys=None):
+    """
+    返回 [Desktop Entry] 段中的键值，本地化键已按当前语言择优合并到无后缀的键名上。
+    给定 keys 时只保留这些键，其余的行在切分键名后即跳过。
+    """
+    candidates = locale_candidates(locale)
+    entry, priority = {}, {}
+    in_entry = False
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] == '#': continue
+        if line[0] == '[':
+            if in_entry: break
+            in_entry = line == f'[{ENTRY_GROUP}]'
+            continue
+        if not in_entry: continue
+        key, sep, value = line.partition('=')
+        if not sep: continue
+        key = key.rstrip()
+        if not key: continue
+        key_locale = None
+        if key[-1:] == ']':
+            key, _, key_locale = key[:-1].partition('[')
+        if keys is not None and key not in keys: continue
+        value = value.lstrip()
+        if key_locale is None: rank = len(candidates)
+        elif key_locale in candidates: rank = candidates.index(key_locale)
+        else: continue
+        if rank <= priority.get(key, rank):
+            entry[key] = value
+            priority[key] = rank
+    return entry
+
+def to_app_info(entry):
+    """把原始键值转换为物品栏使用的 app_info 字段。"""
+    info = {}
+    for key, field in _STRING_KEYS.items():
+        if key in entry: info[field] = unescape(entry[key]).strip()
+    for key, field in _BOOLEAN_KEYS.items():
+        if key in entry: info[field] = entry[key].strip().lower() == 'true'
+    return info
+
+def parse(content, locale=None):
+    return to_app_info(parse_lines(content.splitlines(), locale, _APP_INFO_KEYS))
+
+def parse_file(path, locale=None):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return to_app_info(parse_lines(f, locale, _APP_INFO_KEYS))
+
+def load(path):
+    """带缓存的解析：一次 stat 校验 (mtime, size)，未变化时直接返回缓存结果的副本。"""
+    global cache_hits, cache_misses
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[0] == stamp:
+            _cache.move_to_end(path)
+            cache_hits += 1
+            return dict(cached[1])
+        cache_misses += 1
+    info = parse_file(path)
+    with _cache_lock:
+        _cache[path] = (stamp, info)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_CAPACITY: _cache.popitem(last=False)
+    return dict(info)
+
+def is_available(info):
+    """TryExec 指向的程序不存在，或条目被标记为 Hidden 时，视为不可用。"""
+    if info.get('hidden'): return False
+    try_exec = info.get('try_exec')
+    if try_exec:
+        if os.path.isabs(try_exec): return os.access(try_exec, os.X_OK)
+        return shutil.which(try_exec) is not None
+    return True
+
+def clear_cache():
+    with _cache_lock: _cache.clear()
+
+def cache_stats():
+    return {'hits': cache_hits, 'misses': cache_misses, 'entries': len(_cache)}
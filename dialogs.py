@@ -0,0 +1,259 @@
+"""
+物品栏的各个对话框。主窗口只在第一次打开对话框时才导入本模块，以缩短启动时间。
+"""
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QLabel, QLineEdit, QDialogButtonBox,
+                             QCheckBox, QComboBox, QListWidget, QListWidgetItem)
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QIcon
+
+MODERN_LIGHT_STYLE = """
+    /* --- 基础窗口和字体 --- */
+    QDialog, QWidget {
+        background-color: #F5F5F5;
+        color: #212121;
+        font-size: 14px;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+    }
+
+    /* --- 标签 --- */
+    QLabel {
+        color: #212121;
+        padding-top: 5px;
+    }
+
+    /* --- 输入框和下拉框 --- */
+    QLineEdit, QComboBox {
+        background-color: #FFFFFF;
+        color: #212121;
+        border: 1px solid #DCDCDC;
+        border-radius: 5px;
+        padding: 8px;
+        min-height: 20px;
+    }
+    QLineEdit:focus, QComboBox:focus {
+        border: 1px solid #0078D7;
+    }
+
+    /* --- 下拉框箭头 --- */
+    QComboBox::drop-down {
+        border: none;
+        width: 20px;
+    }
+    QComboBox::down-arrow {
+        image: url(none);
+    }
+
+    /* --- 下拉列表容器 --- */
+    QComboBox QAbstractItemView {
+        background-color: #FFFFFF;
+        border: 1px solid #DCDCDC;
+        border-radius: 5px;
+        outline: 0px;
+    }
+
+    /* --- 下拉列表中的项目 --- */
+    QComboBox QAbstractItemView::item {
+        color: #212121;
+        background-color: transparent;
+        padding: 8px 10px;
+    }
+    QComboBox QAbstractItemView::item:selected, 
+    QComboBox QAbstractItemView::item:hover {
+        background-color: #0078D7;
+        color: #FFFFFF;
+    }
+
+    /* --- 按钮 --- */
+    QPushButton {
+        background-color: #EAEAEA;
+        color: #212121;
+        border: 1px solid #DCDCDC;
+        border-radius: 5px;
+        padding: 8px 16px;
+        font-weight: 500;
+    }
+    QPushButton:hover {
+        background-color: #F0F0F0;
+        border-color: #C0C0C0;
+    }
+    QPushButton:pressed {
+        background-color: #0078D7;
+        color: #FFFFFF;
+        border-color: #005A9E;
+    }
+
+    /* --- 复选框 --- */
+    QCheckBox {
+        spacing: 10px;
+    }
+    QCheckBox::indicator {
+        width: 20px;
+        height: 20px;
+        border-radius: 4px;
+        border: 1px solid #DCDCDC;
+        background-color: #FFFFFF;
+    }
+    QCheckBox::indicator:hover {
+        border-color: #C0C0C0;
+    }
+    QCheckBox::indicator:checked {
+        background-color: #0078D7;
+        border-color: #0078D7;
+    }
+"""
+
+# --- 对话框 ---
+class AppSearchDialog(QDialog):
+    def __init__(self, app_indexer, parent=None):
+        super().__init__(parent)
+        self.app_indexer = app_indexer
+        self.setWindowTitle("搜索应用")
+        self.setMinimumWidth(360)
+        self.setStyleSheet(MODERN_LIGHT_STYLE)
+        self.layout = QVBoxLayout(self)
+        self.search_edit = QLineEdit(self)
+        self.search_edit.setPlaceholderText("输入应用名称...")
+        self.search_edit.textChanged.connect(self.refresh)
+        self.search_edit.returnPressed.connect(self.acceptFirst)
+        self.layout.addWidget(self.search_edit)
+        self.result_list = QListWidget(self)
+        self.result_list.itemActivated.connect(lambda item: self.accept())
+        self.layout.addWidget(self.result_list)
+        self.app_indexer.indexUpdated.connect(self.refresh)
+    def refresh(self):
+        self.result_list.clear()
+        for app in self.app_indexer.index.search(self.search_edit.text()):
+            item = QListWidgetItem(app['name'])
+            item.setData(Qt.UserRole, app['path'])
+            item.setToolTip(app['path'])
+            self.result_list.addItem(item)
+        if self.result_list.count(): self.result_list.setCurrentRow(0)
+    def acceptFirst(self):
+        if self.result_list.count(): self.accept()
+    def keyPressEvent(self, event):
+        if event.key() in (Qt.Key_Down, Qt.Key_Up) and self.search_edit.hasFocus():
+            self.result_list.setFocus()
+            self.result_list.keyPressEvent(event)
+            return
+        super().keyPressEvent(event)
+    def done(self, result):
+        self.app_indexer.indexUpdated.disconnect(self.refresh)
+        super().done(result)
+    def get_path(self):
+        item = self.result_list.currentItem()
+        return item.data(Qt.UserRole) if item else None
+
+class SlotSettingsDialog(QDialog):
+    def __init__(self, app_name, icon_path, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("物品栏设置")
+        self.setStyleSheet(MODERN_LIGHT_STYLE)
+        self.layout = QVBoxLayout(self)
+        self.layout.addWidget(QLabel("应用名称:"))
+        self.name_edit = QLineEdit(self)
+        self.name_edit.setText(app_name)
+        self.layout.addWidget(self.name_edit)
+        self.layout.addWidget(QLabel("图标路径:"))
+        self.icon_edit = QLineEdit(self)
+        self.icon_edit.setText(icon_path)
+        self.layout.addWidget(self.icon_edit)
+        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
+        self.buttons.button(QDialogButtonBox.Ok).setIcon(QIcon())
+        self.buttons.button(QDialogButtonBox.Cancel).setIcon(QIcon())
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+        self.layout.addWidget(self.buttons)
+    def get_data(self): return self.name_edit.text(), self.icon_edit.text()
+
+# --- 总设置对话框 ---
+class GeneralSettingsDialog(QDialog):
+    settingsChanged = pyqtSignal(dict)
+    SCALE_PRESETS = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 7.5, 10.0]
+    GRID_PRESETS = [(9, 1), (9, 2), (9, 3), (9, 4), (12, 1), (12, 2)]
+    IDLE_TRIM_PRESETS = [0, 5, 15, 30, 60]
+    def __init__(self, settings, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("总设置")
+        self.setMinimumWidth(300)
+        self.setStyleSheet(MODERN_LIGHT_STYLE)
+        self.layout = QVBoxLayout(self)
+        self.layout.addWidget(QLabel("窗口层级:"))
+        self.level_combo = QComboBox(self)
+        self.level_combo.addItems(["总在最前", "正常", "置于底层 (桌面部件)"])
+        self.level_combo.setCurrentIndex(settings.get('level', 0))
+        self.level_combo.currentIndexChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.level_combo)
+        self.all_screens_checkbox = QCheckBox("在每个显示器上显示物品栏 (各自独立的格子与设置)", self)
+        self.all_screens_checkbox.setChecked(settings.get('all_screens', False))
+        self.all_screens_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.all_screens_checkbox)
+        self.lock_checkbox = QCheckBox("锁定窗口位置 (不可拖动)", self)
+        self.lock_checkbox.setChecked(not settings.get('is_movable', True))
+        self.lock_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.lock_checkbox)
+        self.skip_running_checkbox = QCheckBox("应用运行中时不重复启动", self)
+        self.skip_running_checkbox.setChecked(settings.get('skip_running_launch', False))
+        self.skip_running_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.skip_running_checkbox)
+        self.activate_running_checkbox = QCheckBox("应用已在运行时切换到它的窗口 (需要 xdotool 或 wmctrl)", self)
+        self.activate_running_checkbox.setChecked(settings.get('activate_running', False))
+        self.activate_running_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.activate_running_checkbox)
+        self.prewarm_checkbox = QCheckBox("鼠标悬停时预读应用程序 (加快冷启动)", self)
+        self.prewarm_checkbox.setChecked(settings.get('prewarm_on_hover', False))
+        self.prewarm_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.prewarm_checkbox)
+        self.painted_checkbox = QCheckBox("单控件绘制 (减少控件数量，大缩放时重绘更快)", self)
+        self.painted_checkbox.setChecked(settings.get('renderer', 'widgets') == 'painted')
+        self.painted_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.painted_checkbox)
+        self.instrumentation_checkbox = QCheckBox("记录操作耗时 (右键菜单中可导出，用于排查卡顿)", self)
+        self.instrumentation_checkbox.setChecked(settings.get('instrumentation', False))
+        self.instrumentation_checkbox.stateChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.instrumentation_checkbox)
+        self.layout.addWidget(QLabel("缩放比例:"))
+        self.scale_combo = QComboBox(self)
+        for scale in self.SCALE_PRESETS:
+            self.scale_combo.addItem(f"{scale:.2f}x", userData=scale)
+        current_scale = settings.get('scale', 2.0)
+        closest_preset = min(self.SCALE_PRESETS, key=lambda x: abs(x - current_scale))
+        self.scale_combo.setCurrentIndex(self.SCALE_PRESETS.index(closest_preset))
+        self.scale_combo.currentIndexChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.scale_combo)
+        self.layout.addWidget(QLabel("格子布局 (列 x 行):"))
+        self.grid_combo = QComboBox(self)
+        current_grid = (settings.get('columns', 9), settings.get('rows', 1))
+        grids = self.GRID_PRESETS if current_grid in self.GRID_PRESETS else self.GRID_PRESETS + [current_grid]
+        for columns, rows in grids:
+            self.grid_combo.addItem(f"{columns} x {rows}", userData=(columns, rows))
+        self.grid_combo.setCurrentIndex(grids.index(current_grid))
+        self.grid_combo.currentIndexChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.grid_combo)
+        self.layout.addWidget(QLabel("空闲多久后释放内存:"))
+        self.idle_trim_combo = QComboBox(self)
+        for minutes in self.IDLE_TRIM_PRESETS:
+            self.idle_trim_combo.addItem(f"{minutes} 分钟" if minutes else "从不", userData=minutes)
+        current_minutes = settings.get('idle_trim_minutes', 30)
+        self.idle_trim_combo.setCurrentIndex(self.IDLE_TRIM_PRESETS.index(min(self.IDLE_TRIM_PRESETS, key=lambda x: abs(x - current_minutes))))
+        self.idle_trim_combo.currentIndexChanged.connect(self.on_settings_changed)
+        self.layout.addWidget(self.idle_trim_combo)
+        self.close_button = QDialogButtonBox(QDialogButtonBox.Close, self)
+        self.close_button.button(QDialogButtonBox.Close).setIcon(QIcon())
+        self.close_button.rejected.connect(self.reject)
+        self.layout.addWidget(self.close_button)
+    def on_settings_changed(self):
+        settings = {
+            'level': self.level_combo.currentIndex(),
+            'all_screens': self.all_screens_checkbox.isChecked(),
+            'is_movable': not self.lock_checkbox.isChecked(),
+            'skip_running_launch': self.skip_running_checkbox.isChecked(),
+            'activate_running': self.activate_running_checkbox.isChecked(),
+            'prewarm_on_hover': self.prewarm_checkbox.isChecked(),
+            'renderer': 'painted' if self.painted_checkbox.isChecked() else 'widgets',
+            'instrumentation': self.instrumentation_checkbox.isChecked(),
+            'scale': self.scale_combo.currentData(),
+            'columns': self.grid_combo.currentData()[0],
+            'rows': self.grid_combo.currentData()[1],
+            'idle_trim_minutes': self.idle_trim_combo.currentData()
+        }
+        self.settingsChanged.emit(settings)
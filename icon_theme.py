@@ -0,0 +1,264 @@
+"""
+图标主题查找。
+
+按 freedesktop Icon Theme 规范把图标名解析为具体文件：读取 index.theme 中的目录信息与 Inherits 继承链，
+对每个主题目录优先用 mmap 读取 gtk-update-icon-cache 生成的 icon-theme.cache，在其哈希表中直接定位图标；
+没有缓存（或缓存比主题目录旧）时扫描一次主题目录，建立 图标名 -> [(子目录, 扩展名)] 的索引代替。
+查找结果按 (图标名, 尺寸, 缩放) 记忆，与 GTK 一样每隔几秒才重新检查一次主题目录是否变化。本模块不依赖 Qt。
+"""
+import os
+import mmap
+import struct
+import threading
+import time
+
+EXTENSIONS = ('png', 'svg', 'xpm')
+# icon-theme.cache 中每个图片条目的标志位 -> 扩展名，按规范的查找顺序排列
+_CACHE_FLAG_EXTENSIONS = ((4, 'png'), (2, 'svg'), (1, 'xpm'))
+RECHECK_INTERVAL = 5.0
+_NO_OFFSET = 0xFFFFFFFF
+
+def _mtime(path):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return None
+
+def icon_name_hash(name):
+    """与 GTK 相同的哈希：按有符号 char 逐字节计算 h = h * 31 + c，结果截断为 32 位。"""
+    data = name.encode('utf-8')
+    if not data: return 0
+    h = (data[0] - 256 if data[0] > 127 else data[0]) & 0xFFFFFFFF
+    for byte in data[1:]:
+        h = (h * 31 + (byte - 256 if byte > 127 else byte)) & 0xFFFFFFFF
+    return h
+
+class IconCacheFile:
+    """只读映射的 icon-theme.cache（格式版本 1.x，大端序）。"""
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        major, _, self._hash_offset, directory_list = struct.unpack_from('>HHII', self._data, 0)
+        if major != 1: raise ValueError(f"unsupported icon cache version {major}")
+        count = self._u32(directory_list)
+        self.directories = [self._string(self._u32(directory_list + 4 + 4 * i)) for i in range(count)]
+        self._buckets = self._u32(self._hash_offset)
+
+    def _u32(self, offset):
+        return struct.unpack_from('>I', self._data, offset)[0]
+
+    def _string(self, offset):
+        end = self._data.find(b'\0', offset)
+        return self._data[offset:end].decode('utf-8', 'replace')
+
+    def lookup(self, name):
+        """返回 [(子目录名, 扩展名)]；图标不在缓存中时返回空列表。"""
+        if not self._buckets: return []
+        encoded = name.encode('utf-8')
+        offset = self._u32(self._hash_offset + 4 + 4 * (icon_name_hash(name) % self._buckets))
+        while offset != _NO_OFFSET:
+            chain, name_offset, image_list = struct.unpack_from('>III', self._data, offset)
+            if self._data[name_offset:name_offset + len(encoded) + 1] == encoded + b'\0':
+                images = []
+                for i in range(self._u32(image_list)):
+                    directory_index, flags = struct.unpack_from('>HH', self._data, image_list + 4 + 8 * i)
+                    for flag, extension in _CACHE_FLAG_EXTENSIONS:
+                        if flags & flag: images.append((self.directories[directory_index], extension))
+                return images
+            offset = chain
+        return []
+
+    def close(self):
+        self._data.close()
+
+def _parse_index_theme(path):
+    groups, current = {}, None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line[0] == '#': continue
+            if line[0] == '[' and line[-1] == ']':
+                current = groups.setdefault(line[1:-1], {})
+                continue
+            key, sep, value = line.partition('=')
+            if sep and current is not None: current[key.strip()] = value.strip()
+    return groups
+
+def _split_list(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+class IconTheme:
+    """一个主题在所有搜索路径下的目录合集。目录元数据取自第一个找到的 index.theme。"""
+    def __init__(self, name, search_paths):
+        self.name = name
+        self.bases = [os.path.join(base, name) for base in search_paths if os.path.isdir(os.path.join(base, name))]
+        self.parents = []
+        # 子目录名 -> (尺寸, 缩放, 类型, 最小, 最大, 阈值)，保持 Directories 中的顺序
+        self.directories = {}
+        self._caches = {}
+        self._indexes = {}
+        self.stamp = self._stamp()
+        for base in self.bases:
+            index_path = os.path.join(base, 'index.theme')
+            if not os.path.isfile(index_path): continue
+            try: groups = _parse_index_theme(index_path)
+            except OSError: continue
+            header = groups.get('Icon Theme', {})
+            self.parents = _split_list(header.get('Inherits'))
+            for directory in _split_list(header.get('Directories')) + _split_list(header.get('ScaledDirectories')):
+                meta = groups.get(directory)
+                if meta is None or directory in self.directories: continue
+                try:
+                    size = int(meta.get('Size', 0))
+                    self.directories[directory] = (
+                        size, int(meta.get('Scale', 1)), meta.get('Type', 'Threshold'),
+                        int(meta.get('MinSize', size)), int(meta.get('MaxSize', size)), int(meta.get('Threshold', 2)))
+                except ValueError: continue
+            break
+        self._order = {directory: i for i, directory in enumerate(self.directories)}
+
+    @property
+    def valid(self):
+        return bool(self.directories)
+
+    def _stamp(self):
+        return tuple((_mtime(base), _mtime(os.path.join(base, 'icon-theme.cache'))) for base in self.bases)
+
+    def _entries(self, base):
+        # 缓存文件至少和主题目录一样新时才可信，这与 GTK 的判断一致
+        if base not in self._caches and base not in self._indexes:
+            cache_path = os.path.join(base, 'icon-theme.cache')
+            cache_mtime, base_mtime = _mtime(cache_path), _mtime(base)
+            if cache_mtime is not None and base_mtime is not None and cache_mtime >= base_mtime:
+                try: self._caches[base] = IconCacheFile(cache_path)
+                except (OSError, ValueError, struct.error): pass
+            if base not in self._caches: self._indexes[base] = self._buildIndex(base)
+        cache = self._caches.get(base)
+        return cache.lookup if cache else (lambda name, index=self._indexes[base]: index.get(name, ()))
+
+    def _buildIndex(self, base):
+        index = {}
+        for directory in self.directories:
+            try: entries = os.scandir(os.path.join(base, directory))
+            except OSError: continue
+            with entries:
+                for entry in entries:
+                    name, dot, extension = entry.name.rpartition('.')
+                    if dot and extension in EXTENSIONS: index.setdefault(name, []).append((directory, extension))
+        return index
+
+    def lookup(self, name, size, scale=1):
+        """在本主题内按规范选出最匹配 size 的文件，没有时返回 None。"""
+        best, best_distance = None, None
+        for base in self.bases:
+            found = {}
+            for directory, extension in self._entries(base)(name):
+                if directory in self._order: found.setdefault(directory, set()).add(extension)
+            # 距离相同时，先出现的搜索路径、Directories 中靠前的目录、png > svg > xpm 优先
+            for directory in sorted(found, key=self._order.get):
+                distance = _size_distance(self.directories[directory], size, scale)
+                if best_distance is None or distance < best_distance:
+                    extension = next(e for e in EXTENSIONS if e in found[directory])
+                    best, best_distance = (base, directory, extension), distance
+            if best_distance == 0: break
+        if best is None: return None
+        base, directory, extension = best
+        return os.path.join(base, directory, f'{name}.{extension}')
+
+    def close(self):
+        for cache in self._caches.values(): cache.close()
+        self._caches.clear()
+
+def _size_distance(meta, size, scale):
+    # 对应规范中的 DirectoryMatchesSize / DirectorySizeDistance，匹配时距离为 0
+    dir_size, dir_scale, kind, min_size, max_size, threshold = meta
+    if dir_scale != scale: return 1 << 20 | abs(dir_size * dir_scale - size * scale)
+    if kind == 'Fixed': return abs(dir_size * dir_scale - size * scale)
+    if kind == 'Scalable':
+        if size * scale < min_size * dir_scale: return min_size * dir_scale - size * scale
+        if size * scale > max_size * dir_scale: return size * scale - max_size * dir_scale
+        return 0
+    if size * scale < (dir_size - threshold) * dir_scale: return min_size * dir_scale - size * scale
+    if size * scale > (dir_size + threshold) * dir_scale: return size * scale - max_size * dir_scale
+    return 0
+
+class IconLookup:
+    """
+    主题图标查找：当前主题 -> 各级 Inherits -> hicolor -> 搜索路径根目录与 /usr/share/pixmaps 中的同名文件。
+    lookup() 可在多个线程中调用。
+    """
+    def __init__(self, theme_name, search_paths, fallback_dirs=('/usr/share/pixmaps',)):
+        self.theme_name = theme_name
+        self.search_paths = list(search_paths)
+        self.fallback_dirs = list(self.search_paths) + [d for d in fallback_dirs if d not in self.search_paths]
+        self._lock = threading.Lock()
+        self._themes = []
+        self._memo = {}
+        self._checked = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    def _loadThemes(self):
+        themes, seen = [], set()
+        def visit(name):
+            if name in seen: return
+            seen.add(name)
+            theme = IconTheme(name, self.search_paths)
+            if not theme.valid: return
+            themes.append(theme)
+            for parent in theme.parents: visit(parent)
+        if self.theme_name: visit(self.theme_name)
+        visit('hicolor')
+        return themes
+
+    def _recheck(self):
+        now = time.monotonic()
+        if self._themes and now - self._checked < RECHECK_INTERVAL: return
+        self._checked = now
+        if self._themes and all(theme.stamp == theme._stamp() for theme in self._themes): return
+        for theme in self._themes: theme.close()
+        self._themes = self._loadThemes()
+        self._memo.clear()
+
+    @property
+    def themes(self):
+        with self._lock:
+            self._recheck()
+            return [theme.name for theme in self._themes]
+
+    def lookup(self, name, size, scale=1):
+        """返回图标文件路径，找不到时返回 None。"""
+        if not name: return None
+        with self._lock:
+            self._recheck()
+            key = (name, size, scale)
+            if key in self._memo:
+                self.hits += 1
+                return self._memo[key]
+            self.misses += 1
+            path = None
+            for theme in self._themes:
+                path = theme.lookup(name, size, scale)
+                if path: break
+            if path is None: path = self._fallback(name)
+            self._memo[key] = path
+            return path
+
+    def _fallback(self, name):
+        for directory in self.fallback_dirs:
+            for extension in EXTENSIONS:
+                path = os.path.join(directory, f'{name}.{extension}')
+                if os.path.isfile(path): return path
+        return None
+
+    def close(self):
+        """释放已映射的缓存文件与查找结果，下次查找时重新加载。"""
+        with self._lock:
+            for theme in self._themes: theme.close()
+            self._themes = []
+            self._memo.clear()
+
+    def stats(self):
+        with self._lock:
+            caches = sum(len(theme._caches) for theme in self._themes)
+            indexes = sum(len(theme._indexes) for theme in self._themes)
+        return {'themes': [theme.name for theme in self._themes], 'mmap_caches': caches, 'built_indexes': indexes,
+                'hits': self.hits, 'misses': self.misses, 'memo': len(self._memo)}
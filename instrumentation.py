@@ -0,0 +1,92 @@
+"""
+热路径计时。
+
+默认关闭；设置环境变量 DESKTOPHOTBAR_INSTRUMENT=1 或在总设置中勾选后，用 @timed(名称) 标记的函数
+每次调用都记录耗时：最近 CAPACITY 次放在环形缓冲区里计算百分位，全部调用另按 2 的幂分桶计数。
+关闭时被标记的函数只多一次全局变量判断。snapshot()/dump() 导出 JSON，用于排查“物品栏用起来卡”这类问题。
+只应在 GUI 线程中记录。本模块不依赖 Qt。
+"""
+import os
+import json
+import time
+import functools
+from array import array
+from pathlib import Path
+
+ENV_VAR = 'DESKTOPHOTBAR_INSTRUMENT'
+CAPACITY = 1024
+PERCENTILES = (50, 90, 95, 99)
+# 第 i 个桶统计耗时 < 2^i 纳秒（且不小于 2^(i-1)）的次数，最后一个桶收容更慢的调用
+BUCKETS = 40
+
+_env_enabled = os.environ.get(ENV_VAR, '') not in ('', '0')
+enabled = _env_enabled
+histograms = {}
+
+class Histogram:
+    __slots__ = ('samples', 'index', 'count', 'total_ns', 'max_ns', 'buckets')
+    def __init__(self):
+        self.samples = array('q', bytes(8 * CAPACITY))
+        self.index = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = array('q', bytes(8 * BUCKETS))
+
+    def add(self, ns):
+        self.samples[self.index] = ns
+        self.index = (self.index + 1) % CAPACITY
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns: self.max_ns = ns
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+
+    def summary(self):
+        window = sorted(self.samples[:min(self.count, CAPACITY)])
+        result = {'count': self.count, 'window': len(window),
+                  'mean_ms': self.total_ns / self.count / 1e6 if self.count else 0.0, 'max_ms': self.max_ns / 1e6}
+        for p in PERCENTILES:
+            # 最近邻秩法，不做插值
+            result[f'p{p}_ms'] = window[min(len(window) - 1, len(window) * p // 100)] / 1e6 if window else 0.0
+        result['histogram_us'] = {f'<{_bucket_bound(i)}': n for i, n in enumerate(self.buckets) if n}
+        return result
+
+def _bucket_bound(i):
+    if i == BUCKETS - 1: return 'inf'
+    us = (1 << i) / 1000
+    return f'{us:.0f}' if us >= 10 else f'{us:.3g}'
+
+def configure(setting_enabled):
+    """按设置开关计时；环境变量打开时始终记录。已记录的数据保留。"""
+    global enabled
+    enabled = bool(setting_enabled) or _env_enabled
+
+def record(name, ns):
+    histogram = histograms.get(name)
+    if histogram is None: histogram = histograms[name] = Histogram()
+    histogram.add(ns)
+
+def timed(name):
+    """装饰器：计时开启时把每次调用的耗时记入名为 name 的直方图。"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled: return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try: return fn(*args, **kwargs)
+            finally: record(name, time.perf_counter_ns() - start)
+        return wrapper
+    return decorate
+
+def snapshot():
+    return {'enabled': enabled, 'pid': os.getpid(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'timings': {name: histogram.summary() for name, histogram in sorted(histograms.items())}}
+
+def dump(directory=None):
+    """把当前统计写成 JSON 文件，返回文件路径。"""
+    directory = Path(directory) if directory else Path.home() / ".cache" / "desktophotbar"
+    os.makedirs(directory, exist_ok=True)
+    path = directory / f"timings-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+    return path
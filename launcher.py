@@ -0,0 +1,460 @@
+"""
+应用启动。
+
+按 Desktop Entry 规范切分 Exec 参数、展开 %f/%F/%u/%U/%i/%c/%k 等字段代码，
+并用 posix_spawn 在新会话中直接启动目标程序（工作目录经 glibc 的 posix_spawn_file_actions_addchdir_np 只在子进程中切换）；只有 Exec 中出现未加引号的 shell 特殊字符时才经由 /bin/sh。
+会遵循 Path= 与 Terminal= 键，并记录每次启动的耗时。本模块不依赖 Qt。
+
+可选的启动辅助进程（LaunchHelper）在主程序导入 PyQt5 之前 fork 出来，之后的启动请求经 Unix socket 交给它，
+由这个地址空间很小的进程去创建子进程；辅助进程退出时自动回退为直接启动。
+posix_spawn 本身不复制主进程的地址空间，辅助进程主要用于 posix_spawn 退化为 fork 的平台，
+因此默认关闭，设置环境变量 DESKTOPHOTBAR_LAUNCH_HELPER=1 开启。
+
+ChildSupervisor 按调用方给定的键（如格子序号）记录启动的子进程：SIGCHLD 经 signal.set_wakeup_fd 写入自管道，
+由主程序的事件循环监视该管道后调用 reap() 回收，得到各键的运行数量与最近一次退出码，无需轮询。
+"""
+import os
+import sys
+import json
+import shlex
+import shutil
+import signal
+import select
+import ctypes
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import quote, urlparse, unquote
+
+# 规范中要求必须放在引号内的保留字符（空格与双引号由切分逻辑本身处理）
+SHELL_RESERVED = set("\t\n'\\><~|&;$*?#()`")
+# 双引号内需要反斜杠转义的字符
+QUOTED_ESCAPES = set('"`$\\')
+DEPRECATED_FIELD_CODES = set('dDnNvm')
+TERMINALS = [('x-terminal-emulator', ['-e']), ('deepin-terminal', ['-e']), ('gnome-terminal', ['--']),
+             ('konsole', ['-e']), ('xfce4-terminal', ['-x']), ('mate-terminal', ['-x']), ('xterm', ['-e'])]
+
+HELPER_ENV = 'DESKTOPHOTBAR_LAUNCH_HELPER'
+HELPER_REPLY_TIMEOUT = 2.0
+
+timings = deque(maxlen=200)
+# glibc 的 posix_spawn_file_actions_t (80 字节) 与 posix_spawnattr_t (336 字节) 都不超过这个大小
+SPAWN_STRUCT_SIZE = 512
+POSIX_SPAWN_SETSID = 0x80
+
+_helper = None
+_supervisor = None
+_libc = None
+
+class ExecError(ValueError):
+    pass
+
+def tokenize_exec(exec_line):
+    """
+    切分 Exec 值，返回 ([(参数, 是否含引号部分), ...], 是否需要 shell)。
+    参数中的字段代码（如 '%U'）原样保留，由 expand_field_codes 展开。
+    """
+    tokens, current, quoted_parts = [], [], False
+    needs_shell = False
+    in_token = False
+    i, length = 0, len(exec_line)
+    while i < length:
+        ch = exec_line[i]
+        if ch == '"':
+            in_token, quoted_parts = True, True
+            i += 1
+            while i < length and exec_line[i] != '"':
+                if exec_line[i] == '\\' and i + 1 < length and exec_line[i + 1] in QUOTED_ESCAPES:
+                    i += 1
+                current.append(exec_line[i])
+                i += 1
+            if i >= length: raise ExecError(f"Exec 中的引号未闭合: {exec_line}")
+            i += 1
+            continue
+        if ch == ' ':
+            if in_token: tokens.append((''.join(current), quoted_parts))
+            current, in_token, quoted_parts = [], False, False
+            i += 1
+            continue
+        if ch in SHELL_RESERVED: needs_shell = True
+        current.append(ch)
+        in_token = True
+        i += 1
+    if in_token: tokens.append((''.join(current), quoted_parts))
+    return tokens, needs_shell
+
+def _file_url(path):
+    return 'file://' + quote(os.path.abspath(path))
+
+def _is_url(value):
+    # 本地路径原样传入，其中的 '#'、'?'、'%' 都是文件名的一部分
+    return not value.startswith('/') and bool(urlparse(value).scheme)
+
+def _local_path(value):
+    if value[:7].lower() == 'file://': return unquote(urlparse(value).path)
+    if _is_url(value): return None
+    return value
+
+def expand_field_codes(tokens, app_info, files=()):
+    """
+    展开字段代码。files 可以是本地路径或 URL：%f/%F 只接收能转成本地路径的项，%u/%U 统一转成 URL。
+    %F/%U/%i 只在单独作为一个参数时展开为多个参数，其余字段代码在参数内原地替换。
+    """
+    paths = [p for p in (_local_path(f) for f in files) if p]
+    urls = [f if _is_url(f) else _file_url(f) for f in files]
+    argv = []
+    for token, quoted in tokens:
+        if not quoted:
+            if token == '%F':
+                argv.extend(paths)
+                continue
+            if token == '%U':
+                argv.extend(urls)
+                continue
+            if token == '%i':
+                if app_info.get('icon'): argv.extend(['--icon', app_info['icon']])
+                continue
+        if '%' not in token:
+            argv.append(token)
+            continue
+        out, i, dropped = [], 0, False
+        while i < len(token):
+            if token[i] == '%' and i + 1 < len(token):
+                code = token[i + 1]
+                i += 2
+                if code == '%': out.append('%')
+                elif code == 'f':
+                    if paths: out.append(paths[0])
+                    else: dropped = True
+                elif code == 'u':
+                    if urls: out.append(urls[0])
+                    else: dropped = True
+                elif code == 'c': out.append(app_info.get('name', ''))
+                elif code == 'k': out.append(app_info.get('path', ''))
+                elif code in 'FUi' or code in DEPRECATED_FIELD_CODES: dropped = True
+                else: out.append('%' + code)  # 未知字段代码按字面保留，兼容不规范的条目
+                continue
+            out.append(token[i])
+            i += 1
+        value = ''.join(out)
+        # 只由一个无值字段代码组成的参数（如单独的 %f）整个去掉，而不是留下空字符串
+        if value or not dropped: argv.append(value)
+    return argv
+
+def build_command(app_info, files=()):
+    """返回 (argv, 是否经由 shell)。"""
+    tokens, needs_shell = tokenize_exec(app_info['exec'])
+    if not tokens: raise ExecError("Exec 为空")
+    argv = expand_field_codes(tokens, app_info, files)
+    if needs_shell: argv = ['/bin/sh', '-c', shell_command(tokens, app_info, files)]
+    if app_info.get('terminal'): argv = terminal_command() + argv
+    return argv, needs_shell
+
+def shell_command(tokens, app_info, files=()):
+    """
+    不符合规范、依赖 shell 语法的 Exec（如 'cd dir; ./run'）：未加引号的普通参数原样保留其 shell 含义，
+    含引号或字段代码的参数展开后重新转义。
+    """
+    parts = []
+    for token, quoted in tokens:
+        if quoted or '%' in token:
+            parts.extend(shlex.quote(arg) for arg in expand_field_codes([(token, quoted)], app_info, files))
+        else:
+            parts.append(token)
+    return ' '.join(parts)
+
+def terminal_command():
+    terminal = os.environ.get('TERMINAL')
+    if terminal and shutil.which(terminal): return [terminal, '-e']
+    for name, args in TERMINALS:
+        path = shutil.which(name)
+        if path: return [path] + args
+    raise ExecError("未找到可用的终端模拟器")
+
+def working_directory(app_info):
+    working_dir = app_info.get('working_dir')
+    if working_dir and os.path.isdir(working_dir): return working_dir
+    return str(Path.home())
+
+def child_environment():
+    env = dict(os.environ)
+    # PyInstaller 打包后会把自带的库目录加入 LD_LIBRARY_PATH，启动的应用不应继承它
+    if hasattr(sys, '_MEIPASS'):
+        original = env.pop('LD_LIBRARY_PATH_ORIG', None)
+        if original is not None: env['LD_LIBRARY_PATH'] = original
+        else: env.pop('LD_LIBRARY_PATH', None)
+    return env
+
+def _spawn_libc():
+    """返回提供 posix_spawn_file_actions_addchdir_np（glibc 2.29+）的 libc，不可用时返回 None。"""
+    global _libc
+    if _libc is None:
+        _libc = False
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                if hasattr(libc, 'posix_spawn_file_actions_addchdir_np'): _libc = libc
+            except OSError: pass
+    return _libc or None
+
+def _posix_spawnp_chdir(libc, argv, cwd, env):
+    # os.posix_spawnp 没有切换工作目录的文件动作，直接调用 libc，目录只在子进程中切换
+    file_actions = ctypes.create_string_buffer(SPAWN_STRUCT_SIZE)
+    attr = ctypes.create_string_buffer(SPAWN_STRUCT_SIZE)
+    c_argv = (ctypes.c_char_p * (len(argv) + 1))(*[os.fsencode(arg) for arg in argv], None)
+    c_env = (ctypes.c_char_p * (len(env) + 1))(*[os.fsencode(f'{key}={value}') for key, value in env.items()], None)
+    pid = ctypes.c_int()
+    libc.posix_spawn_file_actions_init(file_actions)
+    libc.posix_spawnattr_init(attr)
+    try:
+        for fd in (0, 1, 2): libc.posix_spawn_file_actions_addopen(file_actions, fd, os.fsencode(os.devnull), os.O_RDWR, 0)
+        libc.posix_spawn_file_actions_addchdir_np(file_actions, os.fsencode(cwd))
+        libc.posix_spawnattr_setflags(attr, ctypes.c_short(POSIX_SPAWN_SETSID))
+        error = libc.posix_spawnp(ctypes.byref(pid), c_argv[0], file_actions, attr, c_argv, c_env)
+    finally:
+        libc.posix_spawnattr_destroy(attr)
+        libc.posix_spawn_file_actions_destroy(file_actions)
+    if error: raise OSError(error, os.strerror(error), argv[0])
+    return pid.value
+
+def spawn(argv, cwd, env=None):
+    """在新会话中以 cwd 为工作目录启动 argv[0]，标准输入输出重定向到 /dev/null，返回子进程 pid。"""
+    env = env if env is not None else child_environment()
+    if cwd != os.getcwd():
+        libc = _spawn_libc()
+        if libc: return _posix_spawnp_chdir(libc, argv, cwd, env)
+        # 没有 addchdir_np 时由 /bin/sh 在子进程中切换目录后 exec 目标程序
+        argv = ['/bin/sh', '-c', 'cd -- "$0" && exec "$@"', cwd] + list(argv)
+    file_actions = [(os.POSIX_SPAWN_OPEN, fd, os.devnull, os.O_RDWR, 0) for fd in (0, 1, 2)]
+    return os.posix_spawnp(argv[0], argv, env, file_actions=file_actions, setsid=True)
+
+def _reap(pid):
+    try: os.waitpid(pid, 0)
+    except ChildProcessError: pass
+
+class HelperUnavailable(Exception):
+    pass
+
+class LaunchHelper:
+    """
+    预先 fork 的启动辅助进程。与主进程之间用 SOCK_SEQPACKET 传递 JSON 消息：
+    请求 {"id", "argv", "cwd", "env"}（env 与上一次相同时省略），应答 {"id", "pid"} 或 {"id", "error", "errno"}；
+    辅助进程回收自己启动的子进程，并发送 {"event": "exit", "pid", "status"} 通知。
+    """
+    def __init__(self, pid, sock):
+        self.pid = pid
+        self.sock = sock
+        self.alive = True
+        self.events = deque(maxlen=256)
+        self._next_id = 0
+        self._sent_env = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls):
+        parent_sock, child_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            status = 0
+            try: _helper_main(child_sock)
+            except BaseException: status = 1
+            os._exit(status)
+        child_sock.close()
+        return cls(pid, parent_sock)
+
+    def spawn(self, argv, cwd, env):
+        with self._lock:
+            if not self.alive: raise HelperUnavailable("launch helper is not running")
+            self._next_id += 1
+            request_id = self._next_id
+            try:
+                request = {'id': request_id, 'argv': argv, 'cwd': cwd}
+                if env != self._sent_env: request['env'] = env
+                self.sock.settimeout(HELPER_REPLY_TIMEOUT)
+                self.sock.send(json.dumps(request).encode('utf-8'))
+                self._sent_env = env
+                while True:
+                    data = self.sock.recv(65536)
+                    if not data: raise ConnectionError("launch helper closed the socket")
+                    message = json.loads(data)
+                    if message.get('id') == request_id: break
+                    self.events.append(message)
+            except (OSError, ValueError) as e:
+                self.stop()
+                raise HelperUnavailable(str(e)) from e
+        if 'error' in message: raise OSError(message.get('errno', 0), message['error'], message.get('filename'))
+        return message['pid']
+
+    def poll_events(self):
+        """非阻塞地取出辅助进程发来的所有通知（包括 spawn 等待应答期间缓存下来的）。"""
+        with self._lock:
+            events = list(self.events)
+            self.events.clear()
+            if not self.alive: return events
+            self.sock.settimeout(0)
+            while True:
+                try: data = self.sock.recv(65536)
+                except BlockingIOError: break
+                except OSError:
+                    self.stop()
+                    break
+                if not data:
+                    self.stop()
+                    break
+                try: events.append(json.loads(data))
+                except ValueError: pass
+        return events
+
+    def stop(self):
+        self.alive = False
+        try: self.sock.close()
+        except OSError: pass
+        try: os.waitpid(self.pid, os.WNOHANG)
+        except ChildProcessError: pass
+
+def _helper_main(sock):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+    env = dict(os.environ)
+    while True:
+        readable, _, _ = select.select([sock, wakeup_r], [], [])
+        if wakeup_r in readable:
+            try: os.read(wakeup_r, 512)
+            except BlockingIOError: pass
+            while True:
+                try: pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError: break
+                if pid == 0: break
+                sock.send(json.dumps({'event': 'exit', 'pid': pid, 'status': os.waitstatus_to_exitcode(status)}).encode('utf-8'))
+        if sock in readable:
+            data = sock.recv(65536)
+            if not data: return
+            request = json.loads(data)
+            env = request.get('env', env)
+            try:
+                reply = {'id': request['id'], 'pid': spawn(request['argv'], request['cwd'], env)}
+            except OSError as e:
+                reply = {'id': request['id'], 'error': e.strerror or str(e), 'errno': e.errno or 0, 'filename': e.filename}
+            sock.send(json.dumps(reply).encode('utf-8'))
+
+class ChildSupervisor:
+    def __init__(self):
+        self.children = {}
+        self.running = {}
+        self.exit_codes = {}
+        self.wakeup_fd = None
+
+    def install(self):
+        """须在主线程中调用；返回需要由事件循环监视可读的自管道读端。"""
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        # C 层的信号处理函数会立即写入 wakeup fd，不必等 Python 层的处理函数执行
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.set_wakeup_fd(write_fd)
+        self.wakeup_fd = read_fd
+        return read_fd
+
+    def track(self, pid, key, mode):
+        self.children[pid] = (key, mode)
+        if key is not None: self.running[key] = self.running.get(key, 0) + 1
+
+    def forget(self, key):
+        """格子被清空或换成其他应用后，它之前启动的进程不再计入该格子。"""
+        for pid, (child_key, mode) in list(self.children.items()):
+            if child_key == key: self.children[pid] = (None, mode)
+        self.running.pop(key, None)
+        self.exit_codes.pop(key, None)
+
+    def _finished(self, pid, exit_code, changed):
+        key, _ = self.children.pop(pid, (None, None))
+        if key is None: return
+        self.running[key] -= 1
+        if not self.running[key]: del self.running[key]
+        self.exit_codes[key] = exit_code
+        changed.add(key)
+
+    def reap(self):
+        """回收已退出的子进程，返回状态发生变化的键。"""
+        changed = set()
+        if self.wakeup_fd is not None:
+            try:
+                while os.read(self.wakeup_fd, 512): pass
+            except BlockingIOError: pass
+        for pid, (_, mode) in list(self.children.items()):
+            if mode != 'direct': continue
+            try: done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError: done, status = pid, None
+            if done: self._finished(pid, os.waitstatus_to_exitcode(status) if status is not None else None, changed)
+        if _helper is not None:
+            for event in _helper.poll_events():
+                if event.get('event') == 'exit': self._finished(event['pid'], event['status'], changed)
+            if _helper.alive:
+                try:
+                    if os.waitpid(_helper.pid, os.WNOHANG)[0]: _helper.stop()
+                except ChildProcessError: _helper.stop()
+        return changed
+
+def install_supervisor():
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = ChildSupervisor()
+        _supervisor.install()
+    return _supervisor
+
+def helper():
+    return _helper if _helper is not None and _helper.alive else None
+
+def helper_enabled():
+    return os.environ.get(HELPER_ENV, '0') in ('1', 'true', 'yes')
+
+def start_helper():
+    """须在导入 PyQt5、创建任何线程之前调用。"""
+    global _helper
+    if _helper is not None or not hasattr(os, 'fork'): return _helper
+    try: _helper = LaunchHelper.start()
+    except OSError as e: print(f"启动辅助进程失败，将直接启动应用: {e}")
+    return _helper
+
+def stop_helper():
+    global _helper
+    if _helper is not None: _helper.stop()
+    _helper = None
+
+def launch(app_info, files=(), key=None):
+    """
+    启动 app_info 描述的应用，返回 (pid, 启动方式, 耗时秒数)；启动方式为 'helper' 或 'direct'。
+    已安装 ChildSupervisor 时子进程以 key 登记并由它回收，否则由一个等待线程回收。
+    """
+    start = time.perf_counter()
+    argv, via_shell = build_command(app_info, files)
+    cwd, env = working_directory(app_info), child_environment()
+    pid, mode = None, 'direct'
+    if _helper is not None and _helper.alive:
+        try:
+            pid, mode = _helper.spawn(argv, cwd, env), 'helper'
+        except HelperUnavailable as e:
+            print(f"启动辅助进程不可用，改为直接启动: {e}")
+    if pid is None: pid = spawn(argv, cwd, env)
+    if _supervisor is not None: _supervisor.track(pid, key, mode)
+    elif mode == 'direct': threading.Thread(target=_reap, args=(pid,), name=f"reap-{pid}", daemon=True).start()
+    elapsed = time.perf_counter() - start
+    timings.append((app_info.get('name', argv[0]), mode, via_shell, elapsed))
+    return pid, mode, elapsed
+
+def timing_stats():
+    """按启动方式（helper / direct）分别统计启动耗时。"""
+    stats = {}
+    for mode in ('helper', 'direct'):
+        values = sorted(t[3] for t in timings if t[1] == mode)
+        if not values: continue
+        stats[mode] = {'count': len(values), 'mean_ms': sum(values) / len(values) * 1000,
+                       'median_ms': values[len(values) // 2] * 1000, 'max_ms': values[-1] * 1000}
+    return stats
@@ -1,22 +1,102 @@
 import sys
 import os
+import control
+
+# 已有实例在运行时，命令行只把命令转发给它，不导入 PyQt5 及其余模块
+if __name__ == '__main__':
+    exit_code = control.run_cli(sys.argv[1:])
+    if exit_code is not None: sys.exit(exit_code)
+
 import json
-import subprocess
+import hashlib
+import threading
+import time
+import mmap
+import struct
+import signal
+import gc
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import shutil
 
+# --- 启动阶段计时 ---
+def process_age(pid='self'):
+    """返回进程创建至今的秒数，无法读取 /proc 时返回 None。"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f: fields = f.read().rsplit(')', 1)[1].split()
+        # 括号后的第一个字段是第 3 项 state，第 22 项 starttime 以时钟滴答计、从开机算起
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+class StartupProfiler:
+    """
+    --profile-startup：记录从进程创建到首帧呈现的各阶段耗时。
+    PyInstaller 单文件版由引导进程解压后再启动 Python 子进程，此时从引导进程创建算起。
+    """
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.marks = []
+        now = time.perf_counter()
+        age = None
+        if enabled:
+            age = process_age()
+            if hasattr(sys, '_MEIPASS'):
+                try:
+                    if os.readlink(f'/proc/{os.getppid()}/exe') == os.readlink('/proc/self/exe'):
+                        age = process_age(os.getppid()) or age
+                except OSError: pass
+        self.origin = now - age if age is not None else now
+        self.mark("进程创建 -> Python 解释器就绪" if age is not None else "Python 解释器就绪")
+    def mark(self, name):
+        if self.enabled: self.marks.append((name, time.perf_counter()))
+    def report(self):
+        if not self.enabled: return
+        self.enabled = False
+        print("启动阶段耗时:", file=sys.stderr)
+        previous = self.origin
+        for name, moment in self.marks:
+            print(f"  {name:<32} +{(moment - previous) * 1000:8.1f} ms  累计 {(moment - self.origin) * 1000:8.1f} ms", file=sys.stderr)
+            previous = moment
+
+startup_profiler = StartupProfiler('--profile-startup' in sys.argv)
+
+import launcher
+
+# 在导入 PyQt5 之前 fork 启动辅助进程，它的地址空间中不会有 Qt 库和窗口资源
+if __name__ == '__main__' and launcher.helper_enabled():
+    launcher.start_helper()
+
+# 控制 socket 在 fork 辅助进程之后再创建，辅助进程不会持有它
+control_socket = None
+if __name__ == '__main__':
+    try: control_socket = control.listen()
+    except control.AlreadyRunning:
+        # 另一个实例恰好在同一时间启动完成
+        sys.exit(control.run_cli([]) or 0)
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QLabel,
-                           QMessageBox, QMenu, QAction, QDialog, 
-                           QVBoxLayout, QLineEdit, QDialogButtonBox,
-                           QCheckBox, QComboBox, QHBoxLayout)
-from PyQt5.QtCore import Qt, QPoint, QSize, pyqtSignal
-from PyQt5.QtGui import QPixmap, QScreen, QIcon
+                           QMessageBox, QMenu, QDialog, QToolTip)
+from PyQt5.QtCore import (Qt, QPoint, QSize, QRect, QEvent, pyqtSignal, QObject, QTimer, QFileSystemWatcher,
+                          QSocketNotifier, QRunnable, QThread, QThreadPool)
+from PyQt5.QtGui import QPixmap, QScreen, QIcon, QImage, QImageReader, QPainter, QColor, QFont, QFontMetrics
 
 try:
     from PyQt5.Qt import QIcon
 except ImportError:
     pass
 
+from app_index import ApplicationIndex, desktop_id
+import desktop_entry
+from icon_theme import IconLookup, RECHECK_INTERVAL
+import instrumentation
+import proc_scan
+import prewarm
+import memory_trim
+
+startup_profiler.mark("导入 PyQt5 及模块")
+
 
 
 def resource_path(relative_path):
@@ -62,281 +142,1489 @@ def setup_fcitx5_im_plugin():
         # 捕获任何可能的错误，避免程序因此崩溃
         print(f"自动注入 Fcitx5 插件时发生错误: {e}")
 
-MODERN_LIGHT_STYLE = """
-    /* --- 基础窗口和字体 --- */
-    QDialog, QWidget {
-        background-color: #F5F5F5;
-        color: #212121;
-        font-size: 14px;
-        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
-    }
-
-    /* --- 标签 --- */
-    QLabel {
-        color: #212121;
-        padding-top: 5px;
-    }
-
-    /* --- 输入框和下拉框 --- */
-    QLineEdit, QComboBox {
-        background-color: #FFFFFF;
-        color: #212121;
-        border: 1px solid #DCDCDC;
-        border-radius: 5px;
-        padding: 8px;
-        min-height: 20px;
-    }
-    QLineEdit:focus, QComboBox:focus {
-        border: 1px solid #0078D7;
-    }
-
-    /* --- 下拉框箭头 --- */
-    QComboBox::drop-down {
-        border: none;
-        width: 20px;
-    }
-    QComboBox::down-arrow {
-        image: url(none);
-    }
-
-    /* --- 下拉列表容器 --- */
-    QComboBox QAbstractItemView {
-        background-color: #FFFFFF;
-        border: 1px solid #DCDCDC;
-        border-radius: 5px;
-        outline: 0px;
-    }
-
-    /* --- 下拉列表中的项目 --- */
-    QComboBox QAbstractItemView::item {
-        color: #212121;
-        background-color: transparent;
-        padding: 8px 10px;
-    }
-    QComboBox QAbstractItemView::item:selected, 
-    QComboBox QAbstractItemView::item:hover {
-        background-color: #0078D7;
-        color: #FFFFFF;
-    }
-
-    /* --- 按钮 --- */
-    QPushButton {
-        background-color: #EAEAEA;
-        color: #212121;
-        border: 1px solid #DCDCDC;
-        border-radius: 5px;
-        padding: 8px 16px;
-        font-weight: 500;
-    }
-    QPushButton:hover {
-        background-color: #F0F0F0;
-        border-color: #C0C0C0;
-    }
-    QPushButton:pressed {
-        background-color: #0078D7;
-        color: #FFFFFF;
-        border-color: #005A9E;
-    }
-
-    /* --- 复选框 --- */
-    QCheckBox {
-        spacing: 10px;
-    }
-    QCheckBox::indicator {
-        width: 20px;
-        height: 20px;
-        border-radius: 4px;
-        border: 1px solid #DCDCDC;
-        background-color: #FFFFFF;
-    }
-    QCheckBox::indicator:hover {
-        border-color: #C0C0C0;
-    }
-    QCheckBox::indicator:checked {
-        background-color: #0078D7;
-        border-color: #0078D7;
-    }
-"""
-
 # --- 配置文件管理器 ---
 class ConfigManager:
-    def __init__(self):
+    """
+    配置读写。write_behind 模式下 save() 只记录待写内容，由后台线程在 delay 秒内合并为一次写入；
+    内容哈希未变化时跳过写入，文件经临时文件 + fsync + rename 原子替换。退出前需调用 flush()。
+    """
+    def __init__(self, write_behind=True, delay=1.0):
         config_dir = Path.home() / ".config" / "desktophotbar"
         self.config_path = config_dir / "config.json"
         os.makedirs(config_dir, exist_ok=True)
+        self.write_behind = write_behind
+        self.delay = delay
+        self.writes = 0
+        self.skipped = 0
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._pending = None
+        self._deadline = 0.0
+        self._written_digest = None
+        self._writing_digest = None
+        self._worker = None
     def save(self, data):
+        try: content = json.dumps(data, indent=4, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            print(f"Error saving config: {e}")
+            return
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        with self._cond:
+            # 有写入在进行时，它写完后磁盘上的才是最终内容；与之不同的修改必须排队，否则旧的写入会最后落盘
+            if digest == (self._writing_digest or self._written_digest):
+                # 改回了磁盘上的内容，之前排队的写入也不再需要
+                self._pending = None
+                self.skipped += 1
+                return
+            if self._pending and self._pending[1] == digest:
+                self.skipped += 1
+                return
+            self._pending = (content, digest)
+            self._deadline = time.monotonic() + self.delay
+            if self.write_behind:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="config-writer", daemon=True)
+                    self._worker.start()
+                self._cond.notify()
+        if not self.write_behind: self.flush()
+    def flush(self):
+        with self._io_lock:
+            with self._cond:
+                pending, self._pending = self._pending, None
+                if pending: self._writing_digest = pending[1]
+            if pending: self._write(*pending)
+            with self._cond: self._writing_digest = None
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None: self._cond.wait()
+                remaining = self._deadline - time.monotonic()
+                while self._pending is not None and remaining > 0:
+                    self._cond.wait(remaining)
+                    remaining = self._deadline - time.monotonic()
+            self.flush()
+    def _write(self, content, digest):
+        tmp_path = self.config_path.with_name(f".{self.config_path.name}.{os.getpid()}.tmp")
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception as e: print(f"Error saving config: {e}")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_path)
+            dir_fd = os.open(self.config_path.parent, os.O_RDONLY)
+            try: os.fsync(dir_fd)
+            finally: os.close(dir_fd)
+            with self._cond:
+                self._written_digest = digest
+                self.writes += 1
+        except OSError as e:
+            print(f"Error saving config: {e}")
+            try: os.unlink(tmp_path)
+            except OSError: pass
+    def discard_pending(self):
+        """丢弃尚未写出的修改；正在进行的写入先完成，之后 load() 读到的就是磁盘上的最终内容。"""
+        with self._io_lock:
+            with self._cond: self._pending = None
     def load(self):
         if not os.path.exists(self.config_path): return {}
         try:
             with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                content = f.read()
+            data = json.loads(content)
+            with self._cond: self._written_digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+            return data
         except (json.JSONDecodeError, Exception) as e:
             print(f"Error loading config: {e}. Using default.")
             return {}
+    def load_external(self):
+        """
+        读取被其他程序修改过的配置。内容与本进程写入过、正在写入或待写入的一致时返回 None；
+        否则以磁盘内容为准，丢弃尚未写出的修改。
+        """
+        try:
+            with open(self.config_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except OSError: return None
+        digest = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        with self._cond:
+            if digest in (self._written_digest, self._writing_digest) or (self._pending and self._pending[1] == digest):
+                return None
+        try: data = json.loads(content)
+        except ValueError as e:
+            # 编辑器保存到一半或内容有误时保留当前状态，等下一次修改
+            print(f"Error loading config: {e}. Ignoring external change.")
+            return None
+        with self._cond:
+            self._written_digest = digest
+            self._pending = None
+        return data if isinstance(data, dict) else None
+
+# --- 图标缓存 ---
+class IconCache:
+    """
+    两级图标缓存：内存 LRU + ~/.cache/desktophotbar 下渲染好的 PNG。
+    键为 (图标名, 像素尺寸, 主题)，源文件或主题目录的 mtime 变化时条目自动失效。主题图标在未命中时记下解析到的
+    源文件及其 mtime（磁盘缓存写在 PNG 的文本块中），命中时逐个核对；主题目录每 RECHECK_INTERVAL 秒最多检查一次。
+    """
+    SOURCE_PATH_KEY = 'DesktopHotbar-Source'
+    SOURCE_MTIME_KEY = 'DesktopHotbar-Mtime'
+    def __init__(self, cache_dir=None, capacity=128):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".cache" / "desktophotbar" / "icons"
+        self.capacity = capacity
+        self._memory = OrderedDict()
+        self._theme_stamps = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        try: os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError as e: print(f"Error creating icon cache dir: {e}")
+
+    def _mtime(self, path):
+        try: return os.stat(path).st_mtime_ns
+        except OSError: return 0
+
+    def _sourceStamp(self, icon_name, theme):
+        # 路径图标只看文件本身；主题图标看主题根目录及其 icon-theme.cache，外加 pixmaps 兜底目录，
+        # 这部分对所有图标相同，与 IconLookup 一样限频检查。解析到的源文件由条目中记下的 mtime 核对
+        if icon_name.startswith('/') or icon_name.startswith('.'):
+            return (self._mtime(icon_name),)
+        now = time.monotonic()
+        checked = self._theme_stamps.get(theme)
+        if checked and now - checked[0] < RECHECK_INTERVAL: return checked[1]
+        stamp = []
+        for base in QIcon.themeSearchPaths():
+            for name in (theme, 'hicolor'):
+                theme_dir = os.path.join(base, name)
+                stamp.append(self._mtime(theme_dir))
+                stamp.append(self._mtime(os.path.join(theme_dir, 'icon-theme.cache')))
+        stamp.append(self._mtime("/usr/share/pixmaps"))
+        stamp = tuple(stamp)
+        self._theme_stamps[theme] = (now, stamp)
+        return stamp
+
+    def sourceOf(self, path):
+        """源文件及其当前 mtime，与条目一起保存。"""
+        return (path, self._mtime(path))
+
+    def _sourceValid(self, source):
+        return source is None or self._mtime(source[0]) == source[1]
+
+    def _readDisk(self, disk_path):
+        """读取磁盘缓存，返回 (QImage, 源文件)；不存在、损坏或源文件已变化时返回 (None, None)。可在工作线程中调用。"""
+        if not disk_path.exists(): return None, None
+        image = QImage(str(disk_path))
+        if image.isNull(): return None, None
+        path = image.text(self.SOURCE_PATH_KEY)
+        source = (path, int(image.text(self.SOURCE_MTIME_KEY) or 0)) if path else None
+        if not self._sourceValid(source): return None, None
+        return image, source
+
+    def _diskPath(self, key, stamp):
+        key_hash = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        stamp_hash = hashlib.sha1(repr(stamp).encode('utf-8')).hexdigest()[:12]
+        return key_hash, self.cache_dir / f"{key_hash}-{stamp_hash}.png"
+
+    def _remember(self, key, stamp, pixmap, source=None):
+        self._memory[key] = (stamp, pixmap, source)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+
+    def _storeOnDisk(self, key_hash, disk_path, image, source=None):
+        # image 可以是 QPixmap，也可以是后台线程中解码得到的 QImage；源文件写入 PNG 文本块，读回时核对
+        if isinstance(image, QPixmap): image = image.toImage()
+        if source:
+            image.setText(self.SOURCE_PATH_KEY, source[0])
+            image.setText(self.SOURCE_MTIME_KEY, str(source[1]))
+        try:
+            for stale in self.cache_dir.glob(f"{key_hash}-*.png"):
+                if stale != disk_path: stale.unlink()
+            image.save(str(disk_path), 'PNG')
+        except OSError as e: print(f"Error writing icon cache: {e}")
+
+    def keyFor(self, icon_name, size):
+        theme = QIcon.themeName()
+        app = QApplication.instance()
+        dpr = app.devicePixelRatio() if app else 1.0
+        return (icon_name, size, theme, dpr), self._sourceStamp(icon_name, theme)
+
+    def cached(self, key, stamp):
+        """返回 (是否命中, 像素图)；命中的也可能是记录下来的“找不到图标”(None)。"""
+        entry = self._memory.get(key)
+        if entry and entry[0] == stamp and self._sourceValid(entry[2]):
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return True, entry[1]
+        return False, None
+
+    def pixmap(self, icon_name, size, resolver):
+        """返回渲染好的 QPixmap，找不到图标时返回 None。resolver(icon_name, size) 负责真正的主题查找。"""
+        if not icon_name: return None
+        key, stamp = self.keyFor(icon_name, size)
+        dpr = key[3]
+        hit, pixmap = self.cached(key, stamp)
+        if hit: return pixmap
+        key_hash, disk_path = self._diskPath(key, stamp)
+        image, source = self._readDisk(disk_path)
+        if image is not None:
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(dpr)
+            self.disk_hits += 1
+            self._remember(key, stamp, pixmap, source)
+            return pixmap
+        # resolver 给出的是 QIcon（如平台插件提供的主题），不知道源文件，只按主题目录失效
+        self.misses += 1
+        pixmap = None
+        icon = resolver(icon_name, size)
+        if icon:
+            pixmap = icon.pixmap(QSize(size, size))
+            if pixmap.isNull(): pixmap = None
+            else: self._storeOnDisk(key_hash, disk_path, pixmap)
+        self._remember(key, stamp, pixmap)
+        return pixmap
+
+    def discard(self, icon_name, size):
+        """从内存中移除某个图标在该尺寸下的像素图，磁盘缓存保留，下次取用时是一次磁盘命中。"""
+        for key in [k for k in self._memory if k[0] == icon_name and k[1] == size]:
+            del self._memory[key]
+
+    def clear(self):
+        self._memory.clear()
+
+    def retain(self, icon_names):
+        """只保留 icon_names 中图标的像素图，其余从内存中移除（磁盘缓存保留）。"""
+        for key in [k for k in self._memory if k[0] not in icon_names]:
+            del self._memory[key]
+
+    def stats(self):
+        return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'entries': len(self._memory)}
+
+# --- 异步图标加载 ---
+def decodeIconFile(path, pixel_size):
+    """在工作线程中把图标文件解码为 QImage：矢量图按目标尺寸栅格化，位图只缩小不放大（与 QIcon.pixmap 一致）。"""
+    reader = QImageReader(path)
+    natural = reader.size()
+    if natural.isValid() and (reader.format() in (b'svg', b'svgz') or natural.width() > pixel_size or natural.height() > pixel_size):
+        reader.setScaledSize(natural.scaled(pixel_size, pixel_size, Qt.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+class IconRequest:
+    __slots__ = ('icon_name', 'size', 'key', 'stamp', 'key_hash', 'disk_path', 'lookup', 'cancelled', 'task', 'source',
+                 'source_file')
+    def __init__(self, icon_name, size, key, stamp, key_hash, disk_path, lookup):
+        self.icon_name, self.size, self.key, self.stamp = icon_name, size, key, stamp
+        self.key_hash, self.disk_path, self.lookup = key_hash, disk_path, lookup
+        self.cancelled = False
+        self.task = None
+        self.source = None
+        self.source_file = None
+
+class IconDecodeTask(QRunnable):
+    def __init__(self, loader, request):
+        super().__init__()
+        # 由 Python 持有，取消时 tryTake 不会碰到已被线程池删除的对象
+        self.setAutoDelete(False)
+        self.loader, self.request = loader, request
+
+    def run(self):
+        request, image = self.request, None
+        try: image = self.loader.decode(request)
+        except Exception as e: print(f"Error decoding icon {request.icon_name}: {e}")
+        self.loader.decoded.emit(request, image)
+
+class IconLoader(QObject):
+    """
+    图标异步加载：查找文件、读取磁盘缓存、解码与栅格化都在 QThreadPool 的工作线程中生成 QImage，
+    完成后回到 GUI 线程转换为 QPixmap 放入 IconCache，并发出 iconLoaded。同一图标同一尺寸只有一个请求在途；
+    不再需要的请求（如缩放比例又变了）可以取消，尚未开始的直接从线程池队列中移除。
+    """
+    iconLoaded = pyqtSignal(str, int)
+    decoded = pyqtSignal(object, object)
+    # Qt 主题只能在 GUI 线程中查询，找不到主题目录时由工作线程返回这个标记，回到 GUI 线程同步加载
+    NEEDS_QT_THEME = object()
+    def __init__(self, icon_cache, lookup_provider, resolver, parent=None):
+        super().__init__(parent)
+        self.icon_cache = icon_cache
+        self.lookup_provider = lookup_provider
+        self.resolver = resolver
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max(1, min(4, QThread.idealThreadCount() - 1)))
+        self.pending = {}
+        self.completed = 0
+        self.cancelled = 0
+        self.decoded.connect(self.onDecoded)
+
+    def request(self, icon_name, size):
+        """内存缓存命中时返回 (像素图, False)；否则安排后台加载并返回 (None, True)，加载完成后发出 iconLoaded。"""
+        key, stamp = self.icon_cache.keyFor(icon_name, size)
+        hit, pixmap = self.icon_cache.cached(key, stamp)
+        if hit: return pixmap, False
+        if key in self.pending: return None, True
+        key_hash, disk_path = self.icon_cache._diskPath(key, stamp)
+        request = IconRequest(icon_name, size, key, stamp, key_hash, disk_path, self.lookup_provider())
+        request.task = IconDecodeTask(self, request)
+        self.pending[key] = request
+        self.pool.start(request.task)
+        return None, True
+
+    def decode(self, request):
+        # 工作线程：只使用 QImage 与纯 Python 的查找，不创建 QPixmap/QIcon
+        if request.cancelled: return None
+        image, source_file = self.icon_cache._readDisk(request.disk_path)
+        if image is not None:
+            request.source, request.source_file = 'disk', source_file
+            return image
+        name, pixel_size = request.icon_name, int(request.size * request.key[3])
+        if name.startswith('/') or name.startswith('.'): path = name if os.path.isfile(name) else None
+        else:
+            path = request.lookup.lookup(name, pixel_size)
+            if path is None and not request.lookup.themes: return self.NEEDS_QT_THEME
+            # 解码前记下 mtime：解码期间文件被替换时，下次取用会重新解码
+            if path: request.source_file = self.icon_cache.sourceOf(path)
+        if path is None or request.cancelled: return None
+        image = decodeIconFile(path, pixel_size)
+        request.source = 'decoded'
+        if image is not None and not request.cancelled:
+            self.icon_cache._storeOnDisk(request.key_hash, request.disk_path, image, request.source_file)
+        return image
+
+    def onDecoded(self, request, image):
+        if self.pending.get(request.key) is request: del self.pending[request.key]
+        if request.cancelled: return
+        self.completed += 1
+        if image is self.NEEDS_QT_THEME:
+            self.icon_cache.pixmap(request.icon_name, request.size, self.resolver)
+        else:
+            pixmap = None
+            if image is not None:
+                pixmap = QPixmap.fromImage(image)
+                pixmap.setDevicePixelRatio(request.key[3])
+            if request.source == 'disk': self.icon_cache.disk_hits += 1
+            else: self.icon_cache.misses += 1
+            self.icon_cache._remember(request.key, request.stamp, pixmap, request.source_file)
+        self.iconLoaded.emit(request.icon_name, request.size)
+
+    def cancel(self, predicate=None):
+        """取消满足 predicate(request) 的在途请求（默认全部）。"""
+        for key, request in list(self.pending.items()):
+            if predicate and not predicate(request): continue
+            request.cancelled = True
+            self.pool.tryTake(request.task)
+            del self.pending[key]
+            self.cancelled += 1
+
+    def stats(self):
+        return {'pending': len(self.pending), 'completed': self.completed, 'cancelled': self.cancelled,
+                'threads': self.pool.maxThreadCount()}
+
+# --- 精灵图集 ---
+# 各精灵在 1x 下的像素尺寸，运行时与 build_atlas.py 共用同一套取整规则
+SPRITE_BASE_SIZES = {'hotbar': (182, 22), 'hotbar_selection': (24, 23)}
+
+def scaledSpriteSize(name, scale):
+    base_w, base_h = SPRITE_BASE_SIZES[name]
+    return int(base_w * scale), int(base_h * scale)
+
+class SpriteAtlas:
+    """
+    读取构建时生成的 assets/sprites.atlas（各预设缩放下预先缩放好的精灵，内存映射后按偏移切片），
+    图集中没有的尺寸退回到有容量上限的运行时缩放缓存。
+    """
+    MAGIC = b'DHATLAS1'
+    def __init__(self, atlas_path, source_loader, capacity=8):
+        self.source_loader = source_loader
+        self.capacity = capacity
+        self._entries = {}
+        self._mmap = None
+        self._sources = {}
+        self._runtime = OrderedDict()
+        self.atlas_hits = 0
+        self.runtime_hits = 0
+        self.misses = 0
+        self._open(atlas_path)
+
+    def _open(self, atlas_path):
+        try:
+            with open(atlas_path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        try:
+            if mapped[:8] != self.MAGIC: raise ValueError("bad magic")
+            header_len, = struct.unpack_from('<I', mapped, 8)
+            header = json.loads(mapped[12:12 + header_len].decode('utf-8'))
+            if not self._sourcesMatch(header.get('sources', {})): raise ValueError("sources changed")
+            self._format = QImage.Format(header['format'])
+            for sprite in header['sprites']:
+                self._entries[(sprite['name'], sprite['width'], sprite['height'])] = sprite
+            self._mmap = mapped
+        except (ValueError, KeyError, struct.error) as e:
+            print(f"Ignoring sprite atlas {atlas_path}: {e}")
+            mapped.close()
+
+    def _sourcesMatch(self, sources):
+        # 打包后的资源在解压时 mtime 会被重置，但与图集同批生成，直接信任
+        if hasattr(sys, '_MEIPASS'): return True
+        for file_name, mtime_ns in sources.items():
+            try:
+                if os.stat(resource_path(os.path.join('assets', file_name))).st_mtime_ns != mtime_ns: return False
+            except OSError:
+                pass
+        return True
+
+    def pixmap(self, name, width, height):
+        key = (name, width, height)
+        cached = self._runtime.get(key)
+        if cached is not None:
+            self._runtime.move_to_end(key)
+            self.runtime_hits += 1
+            return cached
+        sprite = self._entries.get(key)
+        if sprite:
+            offset, length = sprite['offset'], sprite['stride'] * height
+            # QImage 不持有外部缓冲区，copy() 后再交给 QPixmap，避免引用已释放的切片
+            data = self._mmap[offset:offset + length]
+            pixmap = QPixmap.fromImage(QImage(data, width, height, sprite['stride'], self._format).copy())
+            self.atlas_hits += 1
+        else:
+            source = self.source(name)
+            if source is None: return None
+            pixmap = source.scaled(width, height, Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            self.misses += 1
+        self._runtime[key] = pixmap
+        while len(self._runtime) > self.capacity:
+            self._runtime.popitem(last=False)
+        return pixmap
+
+    def trim(self):
+        # 运行时缩放结果与原图都可以随时重建；图集本身是文件映射，内存紧张时由内核回收
+        self._runtime.clear()
+        self._sources.clear()
+
+    def source(self, name):
+        if name not in self._sources:
+            self._sources[name] = self.source_loader(name)
+        return self._sources[name]
+
+    def stats(self):
+        return {'atlas_sprites': len(self._entries), 'atlas_hits': self.atlas_hits,
+                'runtime_hits': self.runtime_hits, 'misses': self.misses}
+
+# --- 格子布局 ---
+class SlotGrid:
+    """
+    columns x rows 的格子布局。每次布局变化时算好所有缩放后的几何，并为 x/y 两个轴各建一张
+    像素 -> 列/行 的查找表，悬停命中测试只需两次查表，与格子数量无关。
+    """
+    CELL_WIDTH, CELL_HEIGHT = 20, 22
+    SLOT_RECT = (3, 3, 16, 16)
+    SELECTION_RECT = (-1, -1, 24, 23)
+    def __init__(self, columns, rows, scale):
+        self.columns, self.rows, self.scale = columns, rows, scale
+        self.count = columns * rows
+        self.base_size = (self.CELL_WIDTH * columns + 2, self.CELL_HEIGHT * rows)
+        self.width, self.height = int(self.base_size[0] * scale), int(self.base_size[1] * scale)
+        self.slot_rects = [self._scaledRect(self.SLOT_RECT, i) for i in range(self.count)]
+        self.selection_rects = [self._scaledRect(self.SELECTION_RECT, i) for i in range(self.count)]
+        # 选中框之间互有重叠，原先按序号遍历取第一个命中的格子，对应到每个轴上就是取最小的行/列号
+        self._col_origin, self._col_lookup = self._axisLookup([(r[0], r[2]) for r in self.selection_rects[:columns]])
+        self._row_origin, self._row_lookup = self._axisLookup([(r[1], r[3]) for r in self.selection_rects[::columns]])
+
+    def _scaledRect(self, base_rect, index):
+        row, col = divmod(index, self.columns)
+        x, y, w, h = base_rect
+        return (int((x + self.CELL_WIDTH * col) * self.scale), int((y + self.CELL_HEIGHT * row) * self.scale),
+                int(w * self.scale), int(h * self.scale))
+
+    def _axisLookup(self, spans):
+        origin = min(start for start, _ in spans)
+        lookup = [-1] * (max(start + length for start, length in spans) - origin)
+        for index in reversed(range(len(spans))):
+            start, length = spans[index]
+            lookup[start - origin:start - origin + length] = [index] * length
+        return origin, lookup
+
+    def hitTest(self, x, y):
+        col_offset, row_offset = x - self._col_origin, y - self._row_origin
+        if not (0 <= col_offset < len(self._col_lookup) and 0 <= row_offset < len(self._row_lookup)): return -1
+        col, row = self._col_lookup[col_offset], self._row_lookup[row_offset]
+        if col < 0 or row < 0: return -1
+        return row * self.columns + col
+
+    @property
+    def sprite_name(self):
+        # 标准的 9x1 布局直接使用图集中的 hotbar 精灵，其他布局由 hotbar.png 的格子拼出
+        return 'hotbar' if (self.columns, self.rows) == (9, 1) else f'hotbar@{self.columns}x{self.rows}'
+
+# --- 单控件渲染 ---
+class HotbarCanvas(QWidget):
+    """
+    单控件渲染模式：背景、格子图标、运行指示条和选中框都在这一个控件的 paintEvent 中用缓存的像素图绘制，
+    悬停变化时只重绘新旧两个选中框区域。格子内容由 HotbarWindow 通过 set* 方法推送。
+    """
+    RUNNING_COLOR = QColor('#55FF55')
+    RUNNING_BORDER_COLOR = QColor('#1E6B1E')
+    def __init__(self, hotbar):
+        super().__init__(hotbar)
+        self.hotbar = hotbar
+        # 每次重绘都先清空重绘区域，父窗口不必再在下面绘制一遍
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMouseTracking(True)
+        self.setAcceptDrops(True)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.onContextMenuRequested)
+        self.grid = None
+        self.background = None
+        self.selection = None
+        self.slot_pixmaps = []
+        self.running = []
+        self.tooltips = []
+        self.hover_slot = -1
+
+    def setGrid(self, grid, background, selection):
+        self.grid = grid
+        self.background, self.selection = background, selection
+        self.slot_pixmaps = [None] * grid.count
+        self.running = [False] * grid.count
+        self.tooltips = [''] * grid.count
+        self.hover_slot = -1
+        self.setFixedSize(grid.width, grid.height)
+        self.update()
+
+    def slotRect(self, index):
+        return QRect(*self.grid.slot_rects[index])
+
+    def runningBarRect(self, slot_rect):
+        w, h = slot_rect.width(), slot_rect.height()
+        return QRect(slot_rect.x() + int(w * 2 / 16), slot_rect.y() + int(h * 13 / 16), int(w * 13 / 16), max(2, int(h * 2 / 16)))
+
+    def setSlotContent(self, index, pixmap, text=''):
+        # 没有图标时把名称前两个字渲染成像素图缓存起来，不再为每个格子解析样式表
+        if pixmap is None and text:
+            rect = self.slotRect(index)
+            pixmap = QPixmap(rect.size())
+            pixmap.fill(Qt.transparent)
+            painter = QPainter(pixmap)
+            font = QFont(self.font())
+            font.setBold(True)
+            font.setPixelSize(max(8, int(rect.height() * 0.5)))
+            painter.setFont(font)
+            painter.setPen(Qt.white)
+            painter.drawText(pixmap.rect(), Qt.AlignCenter, text)
+            painter.end()
+        self.slot_pixmaps[index] = pixmap
+        self.update(self.slotRect(index))
+
+    def setRunning(self, index, running, tooltip):
+        self.tooltips[index] = tooltip
+        if self.running[index] == running: return
+        self.running[index] = running
+        self.update(self.runningBarRect(self.slotRect(index)))
+
+    def setHover(self, index):
+        if index == self.hover_slot: return
+        if self.hover_slot >= 0: self.update(QRect(*self.grid.selection_rects[self.hover_slot]))
+        self.hover_slot = index
+        if index >= 0: self.update(QRect(*self.grid.selection_rects[index]))
+
+    def paintEvent(self, event):
+        dirty = event.region()
+        painter = QPainter(self)
+        # 背景按源模式直接覆盖重绘区域（含透明像素），同时完成清空，只复制脏区域内的部分
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        for rect in dirty.rects():
+            if self.background: painter.drawPixmap(rect, self.background, rect)
+            else: painter.fillRect(rect, Qt.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+        if self.grid:
+            for index, pixmap in enumerate(self.slot_pixmaps):
+                slot_rect = self.slotRect(index)
+                if not dirty.intersects(slot_rect): continue
+                if pixmap:
+                    size = pixmap.size() / pixmap.devicePixelRatio()
+                    painter.drawPixmap(slot_rect.x() + (slot_rect.width() - size.width()) // 2,
+                                       slot_rect.y() + (slot_rect.height() - size.height()) // 2, pixmap)
+                if self.running[index]:
+                    bar = self.runningBarRect(slot_rect)
+                    painter.fillRect(bar, self.RUNNING_COLOR)
+                    painter.fillRect(bar.x(), bar.bottom(), bar.width(), 1, self.RUNNING_BORDER_COLOR)
+            if self.hover_slot >= 0 and self.selection:
+                x, y = self.grid.selection_rects[self.hover_slot][:2]
+                painter.drawPixmap(x, y, self.selection)
+        painter.end()
+        self.hotbar.framePainted()
+
+    def slotAt(self, pos):
+        return self.grid.hitTest(pos.x(), pos.y()) if self.grid else -1
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self.slotAt(event.pos())
+            if index >= 0 and self.tooltips[index]: QToolTip.showText(event.globalPos(), self.tooltips[index], self)
+            else: QToolTip.hideText()
+            return True
+        return super().event(event)
+
+    def mousePressEvent(self, event):
+        index = self.slotAt(event.pos())
+        # 格子之外的按下事件交给主窗口，用于拖动窗口
+        if index < 0: event.ignore()
+        else: self.hotbar.slotClicked(event, index)
+
+    def onContextMenuRequested(self, point):
+        index = self.slotAt(point)
+        if index >= 0: self.hotbar.showContextMenu(self.mapToGlobal(point), index)
+
+    def dragEnterEvent(self, event):
+        self.hotbar.dragEnterEvent(event)
 
-# --- 对话框 ---
-class SlotSettingsDialog(QDialog):
-    def __init__(self, app_name, icon_path, parent=None):
+    def dropEvent(self, event):
+        index = self.slotAt(event.pos())
+        if index >= 0: self.hotbar.dropEvent(event, index)
+
+# --- 单实例控制 ---
+class ControlServer(QObject):
+    """由事件循环驱动控制 socket：监听端和每个连接各有一个 QSocketNotifier，读到完整的一行请求后应答并关闭连接。"""
+    def __init__(self, server, handler, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("物品栏设置")
-        self.setStyleSheet(MODERN_LIGHT_STYLE)
-        self.layout = QVBoxLayout(self)
-        self.layout.addWidget(QLabel("应用名称:"))
-        self.name_edit = QLineEdit(self)
-        self.name_edit.setText(app_name)
-        self.layout.addWidget(self.name_edit)
-        self.layout.addWidget(QLabel("图标路径:"))
-        self.icon_edit = QLineEdit(self)
-        self.icon_edit.setText(icon_path)
-        self.layout.addWidget(self.icon_edit)
-        self.buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel, self)
-        self.buttons.button(QDialogButtonBox.Ok).setIcon(QIcon())
-        self.buttons.button(QDialogButtonBox.Cancel).setIcon(QIcon())
-        self.buttons.accepted.connect(self.accept)
-        self.buttons.rejected.connect(self.reject)
-        self.layout.addWidget(self.buttons)
-    def get_data(self): return self.name_edit.text(), self.icon_edit.text()
-
-# --- 总设置对话框 ---
-class GeneralSettingsDialog(QDialog):
-    settingsChanged = pyqtSignal(dict)
-    SCALE_PRESETS = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, 7.5, 10.0]
-    def __init__(self, settings, parent=None):
+        self.server = server
+        self.handler = handler
+        self.clients = {}
+        self.notifier = QSocketNotifier(server.fileno(), QSocketNotifier.Read, self)
+        self.notifier.activated.connect(self.accept)
+
+    def accept(self):
+        while True:
+            try: conn, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError): return
+            except OSError as e:
+                print(f"Error accepting control connection: {e}")
+                return
+            conn.setblocking(False)
+            notifier = QSocketNotifier(conn.fileno(), QSocketNotifier.Read, self)
+            notifier.activated.connect(self.read)
+            self.clients[conn.fileno()] = (conn, bytearray(), notifier)
+
+    def read(self, fd):
+        conn, buffer, notifier = self.clients[fd]
+        try: chunk = conn.recv(65536)
+        except (BlockingIOError, InterruptedError): return
+        except OSError: chunk = b''
+        buffer.extend(chunk)
+        if chunk and b'\n' not in buffer and len(buffer) < control.MAX_REQUEST: return
+        notifier.setEnabled(False)
+        del self.clients[fd]
+        if buffer:
+            reply = control.handle_request(bytes(buffer).split(b'\n', 1)[0], self.handler)
+            try:
+                conn.settimeout(control.CLIENT_TIMEOUT)
+                conn.sendall(reply)
+            except OSError: pass
+        conn.close()
+        notifier.deleteLater()
+
+    def close(self):
+        self.notifier.setEnabled(False)
+        for conn, _, notifier in self.clients.values():
+            notifier.setEnabled(False)
+            conn.close()
+        self.clients.clear()
+        control.close(self.server)
+
+# --- 应用索引 ---
+class AppIndexer(QObject):
+    """
+    在后台线程中维护 ApplicationIndex：启动时读取持久化索引并增量扫描，
+    之后通过 QFileSystemWatcher 监视应用目录，变化时只重新扫描对应目录。
+    尚不存在的应用目录（如首次安装 Flatpak 应用之前的 exports 目录）监视其最近的已存在上级目录，出现后再扫描。
+    """
+    indexUpdated = pyqtSignal()
+    _scanFinished = pyqtSignal()
+    def __init__(self, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("总设置")
-        self.setMinimumWidth(300)
-        self.setStyleSheet(MODERN_LIGHT_STYLE)
-        self.layout = QVBoxLayout(self)
-        self.layout.addWidget(QLabel("窗口层级:"))
-        self.level_combo = QComboBox(self)
-        self.level_combo.addItems(["总在最前", "正常", "置于底层 (桌面部件)"])
-        self.level_combo.setCurrentIndex(settings.get('level', 0))
-        self.level_combo.currentIndexChanged.connect(self.on_settings_changed)
-        self.layout.addWidget(self.level_combo)
-        self.lock_checkbox = QCheckBox("锁定窗口位置 (不可拖动)", self)
-        self.lock_checkbox.setChecked(not settings.get('is_movable', True))
-        self.lock_checkbox.stateChanged.connect(self.on_settings_changed)
-        self.layout.addWidget(self.lock_checkbox)
-        self.layout.addWidget(QLabel("缩放比例:"))
-        self.scale_combo = QComboBox(self)
-        for scale in self.SCALE_PRESETS:
-            self.scale_combo.addItem(f"{scale:.2f}x", userData=scale)
-        current_scale = settings.get('scale', 2.0)
-        closest_preset = min(self.SCALE_PRESETS, key=lambda x: abs(x - current_scale))
-        self.scale_combo.setCurrentIndex(self.SCALE_PRESETS.index(closest_preset))
-        self.scale_combo.currentIndexChanged.connect(self.on_settings_changed)
-        self.layout.addWidget(self.scale_combo)
-        self.close_button = QDialogButtonBox(QDialogButtonBox.Close, self)
-        self.close_button.button(QDialogButtonBox.Close).setIcon(QIcon())
-        self.close_button.rejected.connect(self.reject)
-        self.layout.addWidget(self.close_button)
-    def on_settings_changed(self):
-        settings = {
-            'level': self.level_combo.currentIndex(),
-            'is_movable': not self.lock_checkbox.isChecked(),
-            'scale': self.scale_combo.currentData()
-        }
-        self.settingsChanged.emit(settings)
+        self.index = ApplicationIndex()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.onDirectoryChanged)
+        self._dirty_dirs = set()
+        self._missing = {}
+        self._scanning = False
+        self._rescan_timer = QTimer(self)
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(500)
+        self._rescan_timer.timeout.connect(self.startRescan)
+        self._scanFinished.connect(self.onScanFinished)
+
+    def start(self):
+        self._runScan(None, initial=True)
+
+    @staticmethod
+    def nearestExistingDir(path):
+        while not os.path.isdir(path):
+            parent = os.path.dirname(path)
+            if parent == path: return None
+            path = parent
+        return path
+
+    def onDirectoryChanged(self, path):
+        for app_dir in self.index.dirs:
+            if path == app_dir or path.startswith(app_dir.rstrip(os.sep) + os.sep):
+                self._dirty_dirs.add(app_dir)
+        # 上级目录的其他变化（如 ~/.local/share 下别的程序写文件）不必扫描，只在离应用目录更近一层出现时处理
+        for app_dir, parent in self._missing.items():
+            if path == parent and self.nearestExistingDir(app_dir) != parent: self._dirty_dirs.add(app_dir)
+        # 安装软件包时往往连续触发多次，合并为一次扫描
+        self._rescan_timer.start()
+
+    def startRescan(self):
+        if self._scanning:
+            self._rescan_timer.start()
+            return
+        dirs, self._dirty_dirs = list(self._dirty_dirs), set()
+        if dirs: self._runScan(dirs)
+
+    def _runScan(self, dirs, initial=False):
+        self._scanning = True
+        def scan():
+            try:
+                if initial: self.index.load()
+                if self.index.rescan(dirs) or initial: self.index.save()
+            except Exception as e: print(f"Error scanning applications: {e}")
+            self._scanFinished.emit()
+        threading.Thread(target=scan, name="app-indexer", daemon=True).start()
+
+    def onScanFinished(self):
+        self._scanning = False
+        watched = set(self.watcher.directories())
+        previous, self._missing = self._missing, {}
+        app_roots = set()
+        for app_dir in self.index.dirs:
+            if not os.path.isdir(app_dir):
+                parent = self.nearestExistingDir(app_dir)
+                if parent: self._missing[app_dir] = parent
+                continue
+            for root, _, _ in os.walk(app_dir):
+                app_roots.add(root)
+                if root not in watched: self.watcher.addPath(root)
+        for parent in set(self._missing.values()) - watched: self.watcher.addPath(parent)
+        stale = set(previous.values()) - set(self._missing.values()) - app_roots
+        if stale: self.watcher.removePaths(list(stale))
+        # 刚出现的目录在扫描与加入监视之间可能又写入了文件，再补扫一次
+        appeared = [app_dir for app_dir in previous if app_dir not in self._missing and os.path.isdir(app_dir)]
+        if appeared:
+            self._dirty_dirs.update(appeared)
+            self._rescan_timer.start()
+        self.indexUpdated.emit()
+
+# --- 批量导入 ---
+def containsDesktopFiles(directory):
+    # 只看第一层，找到一个就停止；不含 .desktop 文件的目录按普通文件交给应用打开
+    try:
+        with os.scandir(directory) as entries:
+            return any(entry.name.endswith('.desktop') for entry in entries)
+    except OSError: return False
+
+class DesktopImporter(QObject):
+    """
+    批量导入拖入的 .desktop 文件与目录：在线程池中并行解析，结果按文件顺序逐个交回 GUI 线程，
+    格子随之逐个显示；导入数量达到 capacity 或调用 stop() 后取消剩余的解析。目录中的条目跳过 NoDisplay、Hidden 与
+    TryExec 不可用的应用。同一 desktop 文件 ID 只取第一次出现的路径（与 XDG 目录的覆盖规则一致），
+    exclude_ids 中的 ID（已在当前页上的应用）也会跳过。
+    """
+    entryReady = pyqtSignal(object)
+    finished = pyqtSignal(int, int)
+    WORKERS = 4
+    def __init__(self, sources, capacity, exclude_ids, parent=None):
+        super().__init__(parent)
+        self.sources = sources
+        self.capacity = capacity
+        self.exclude_ids = exclude_ids
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+    def start(self):
+        threading.Thread(target=self._run, name="desktop-import", daemon=True).start()
+
+    def _expand(self):
+        for path in self.sources:
+            if not os.path.isdir(path):
+                if path.endswith('.desktop'): yield path, False, desktop_id(path)
+                continue
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if not name.endswith('.desktop'): continue
+                    file_path = os.path.join(root, name)
+                    yield file_path, True, desktop_id(file_path, path)
+
+    def _parse(self, path, from_directory):
+        try: entry = desktop_entry.load(path)
+        except (OSError, UnicodeError) as e:
+            print(f"Error reading {path}: {e}")
+            return None
+        if not entry.get('exec'): return None
+        if from_directory and (entry.get('no_display') or not entry.get('name') or not desktop_entry.is_available(entry)): return None
+        app_info = {key: entry[key] for key in HotbarWindow.SLOT_ENTRY_FIELDS if key in entry}
+        app_info['path'] = path
+        return app_info
+
+    def _run(self):
+        imported = skipped = 0
+        try:
+            # 同时拖入 /usr/share/applications 与 ~/.local/share/applications 时，被覆盖的应用只导入一次
+            seen, paths = set(self.exclude_ids), []
+            for path, from_directory, entry_id in self._expand():
+                if entry_id in seen: continue
+                seen.add(entry_id)
+                paths.append((path, from_directory))
+            with ThreadPoolExecutor(self.WORKERS, thread_name_prefix="desktop-parse") as pool:
+                futures = [pool.submit(self._parse, path, from_directory) for path, from_directory in paths]
+                for future in futures:
+                    if imported >= self.capacity or self.stopped: break
+                    app_info = future.result()
+                    if app_info is None:
+                        skipped += 1
+                        continue
+                    imported += 1
+                    self.entryReady.emit(app_info)
+                for future in futures: future.cancel()
+        except Exception as e: print(f"Error importing desktop files: {e}")
+        self.finished.emit(imported, skipped)
+
+# --- 运行中应用检测 ---
+class RunningAppMonitor(QObject):
+    """
+    定时在后台线程中用 ProcessScanner 增量扫描 /proc，找出所有物品栏各页格子中已在运行的应用（包括不是由物品栏启动的）。
+    最近有操作时每 ACTIVE_INTERVAL 毫秒扫描一次，空闲 IDLE_AFTER 秒后放慢到 IDLE_INTERVAL，窗口隐藏时不扫描。
+    """
+    changed = pyqtSignal(set)
+    _scanFinished = pyqtSignal(object)
+    _activateFinished = pyqtSignal(object, bool)
+    ACTIVE_INTERVAL = 2000
+    IDLE_INTERVAL = 15000
+    IDLE_AFTER = 60.0
+    def __init__(self, window):
+        super().__init__(window)
+        self.window = window
+        self.scanner = proc_scan.ProcessScanner()
+        self.running = {}
+        self.last_activity = time.monotonic()
+        self.last_scan = 0.0
+        self.scan_ms = 0.0
+        self._scanning = False
+        self.activating = set()
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        self._scanFinished.connect(self.onScanFinished)
+        self._activateFinished.connect(self.onActivateFinished)
+
+    def start(self):
+        if self.scanner.available: self.tick()
+
+    def poke(self):
+        """用户有操作：恢复快速扫描，上次扫描已经过期时立即扫描一次。"""
+        self.last_activity = time.monotonic()
+        if not self.scanner.available or self._scanning: return
+        if self.last_activity - self.last_scan > self.ACTIVE_INTERVAL / 1000: self.tick()
+
+    def tick(self):
+        if self._scanning: return
+        windows = self.window.allWindows()
+        if not any(window.isVisible() for window in windows):
+            self.timer.start(self.IDLE_INTERVAL)
+            return
+        # 所有页的格子一起匹配，翻页时不必等待下一次扫描
+        targets = {window.key_prefix + (page_index, slot_index): app_info['exec'] for window in windows
+                   for page_index, page in enumerate(window.pages)
+                   for slot_index, app_info in enumerate(page) if app_info and app_info.get('exec')}
+        self._scanning = True
+        self.last_scan = time.monotonic()
+        def scan():
+            start = time.perf_counter()
+            running = None
+            try:
+                self.scanner.set_targets(targets)
+                running = self.scanner.scan()
+            except Exception as e: print(f"Error scanning processes: {e}")
+            self.scan_ms = (time.perf_counter() - start) * 1000
+            self._scanFinished.emit(running)
+        threading.Thread(target=scan, name="proc-scan", daemon=True).start()
+
+    def onScanFinished(self, running):
+        self._scanning = False
+        if running is not None:
+            changed = running.keys() ^ self.running.keys()
+            self.running = running
+            if changed: self.changed.emit(changed)
+        idle = time.monotonic() - self.last_activity > self.IDLE_AFTER
+        self.timer.start(self.IDLE_INTERVAL if idle else self.ACTIVE_INTERVAL)
+
+    def activate(self, key, pids, on_failed):
+        """在后台线程中切换到 pids 的窗口（要调用 xdotool/wmctrl，可能耗时上百毫秒）；失败时在 GUI 线程中调用 on_failed()。"""
+        if key in self.activating: return
+        self.activating.add(key)
+        def run():
+            try: ok = proc_scan.activate(pids)
+            except Exception as e:
+                print(f"Error activating window: {e}")
+                ok = False
+            self._activateFinished.emit((key, on_failed), ok)
+        threading.Thread(target=run, name="activate", daemon=True).start()
+
+    def onActivateFinished(self, request, ok):
+        key, on_failed = request
+        self.activating.discard(key)
+        if not ok: on_failed()
+
+    def stats(self):
+        return dict(self.scanner.stats(), running=len(self.running), last_scan_ms=self.scan_ms)
+
+# --- 性能计时 ---
+class FirstPaintTimer(QObject):
+    """把从 start_ns 到控件第一次绘制完成的耗时记入 instrumentation 的 name 直方图。"""
+    def __init__(self, widget, name, start_ns):
+        super().__init__(widget)
+        self.name, self.start_ns = name, start_ns
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            # 绘制在这次事件分发中同步完成，零延时定时器在它之后触发
+            QTimer.singleShot(0, self.finish)
+        return False
+
+    def finish(self):
+        instrumentation.record(self.name, time.perf_counter_ns() - self.start_ns)
+        # 菜单会被缓存复用，计时器用完即删，不在菜单下堆积
+        self.deleteLater()
+
+def screenName(screen):
+    # 显示器名（如 HDMI-1）在重新接入后保持不变，用作配置中的键；没有名字时退回几何位置
+    if screen.name(): return screen.name()
+    geometry = screen.geometry()
+    return f"{geometry.x()},{geometry.y()} {geometry.width()}x{geometry.height()}"
+
+# 右键菜单的书本样式，{path} 为 book.png 的路径；书本拉伸到菜单大小，菜单至少与图片一样大（BOOK_MENU_SIZE）
+BOOK_MENU_SIZE = (150, 184)
+BOOK_MENU_STYLE = """
+    QMenu {{
+        background-color: transparent;
+        border-image: url({path}) 0 0 0 0 stretch stretch;
+        border: none;
+    }}
+    QMenu::item {{
+        color: #402A18;
+        background-color: transparent;
+        padding: 3px 25px;
+        margin: 2px 0px;
+        font-weight: 500;
+    }}
+    QMenu::item:selected {{
+        color: #000000;
+        font-weight: bold;
+        background-color: rgba(0, 0, 0, 0.05);
+        border-radius: 3px;
+    }}
+    QMenu::item:disabled {{
+        color: #000000;
+        font-weight: bold;
+        padding-top: 18px;
+        padding-bottom: 5px;
+    }}
+"""
 
 # --- 主窗口 ---
 class HotbarWindow(QMainWindow):
-    def __init__(self):
+    # 从 .desktop 文件复制到格子里的字段，其中 exec/working_dir/terminal 会在启动前按文件的最新内容刷新
+    SLOT_ENTRY_FIELDS = ('name', 'icon', 'exec', 'working_dir', 'terminal')
+    LAUNCH_ENTRY_FIELDS = ('exec', 'working_dir', 'terminal')
+    # 页数与数字键 1~9 对应；当前页前后各一页的图标会预先渲染，更远的页面从内存缓存中释放
+    PAGE_COUNT = 9
+    PREFETCH_DISTANCE = 1
+    # 这些设置变化时才需要重新布局；其余设置（如 is_movable）在使用时读取，无需额外处理
+    LAYOUT_SETTINGS = ('scale', 'columns', 'rows', 'renderer')
+    # 其他显示器上的物品栏初次出现时沿用主物品栏的这些设置
+    # 对整个进程生效的设置只保存在主物品栏中，在附加物品栏的设置对话框里修改时转交给主物品栏
+    PROCESS_SETTINGS = ('all_screens', 'instrumentation')
+    SCREEN_INHERITED_SETTINGS = ('level', 'is_movable', 'scale', 'columns', 'rows', 'renderer', 'skip_running_launch',
+                                 'activate_running', 'prewarm_on_hover', 'idle_trim_minutes')
+    def __init__(self, main_window=None, screen=None):
+        """
+        main_window 为 None 时是主物品栏，负责配置读写、子进程回收、控制 socket 等全进程只需一份的工作；
+        否则是显示在 screen 上的附加物品栏，与主物品栏共用图标缓存、精灵、配置写入和各类后台扫描，
+        格子与设置保存在配置的 screens[显示器名] 中，子进程等以 (显示器名, 页, 格子) 为键。
+        """
         super().__init__()
-        self.config_manager = ConfigManager()
+        self.main_window = main_window
+        self.target_screen = screen
+        self.screen_name = screenName(screen) if main_window else None
+        self.key_prefix = (self.screen_name,) if main_window else ()
+        self.screen_windows = {}
+        self.screen_configs = {}
+        if main_window:
+            for name in ('config_manager', 'icon_cache', 'icon_loader', 'sprites', 'app_indexer', 'running_monitor',
+                         'prewarmer', 'child_supervisor'):
+                setattr(self, name, getattr(main_window, name))
+        else:
+            self.config_manager = ConfigManager()
+            self.icon_cache = IconCache()
+            self.icon_loader = IconLoader(self.icon_cache, self.iconLookup, self.getBestIcon, self)
+        self.icon_lookup = None
+        self.icon_loader.iconLoaded.connect(self.onIconLoaded)
         self.settings = {}
-        self.slots = [None] * 9
+        self.pages = [[None] * 9 for _ in range(self.PAGE_COUNT)]
+        self.current_page = 0
         self.load_config()
-        self.BASE_WIDTH, self.BASE_HEIGHT = 182, 22
+        startup_profiler.mark("读取配置")
         self.general_settings_dialog = None
+        # 首帧呈现之前只显示背景，图标在首帧之后再解析和渲染
+        self.icons_ready = False
+        self.first_frame_shown = False
         self.current_hover_slot = -1
-        self.SLOT_GEOMETRIES = [(3,3,16,16),(23,3,16,16),(43,3,16,16),(63,3,16,16),(83,3,16,16),(103,3,16,16),(123,3,16,16),(143,3,16,16),(163,3,16,16)]
-        self.SELECTION_GEOMETRIES = [(-1,-1,24,23),(19,-1,24,23),(39,-1,24,23),(59,-1,24,23),(79,-1,24,23),(99,-1,24,23),(119,-1,24,23),(139,-1,24,23),(159,-1,24,23)]
+        self.last_hover_pos = None
+        self.grid = None
+        self.canvas = None
+        self.wheel_delta = 0
+        if not main_window:
+            self.app_indexer = AppIndexer(self)
+            self.running_monitor = RunningAppMonitor(self)
+            self.running_monitor.changed.connect(self.onRunningAppsChanged)
+            self.prewarmer = prewarm.Prewarmer()
+        self.control_server = None
+        self.desktop_import = None
+        self.book_menu_style = None
+        self.context_menus = {}
+        self.menu_slot = -1
+        self.idle = False
+        self.idle_trims = []
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.timeout.connect(self.enterIdle)
+        if main_window:
+            self.initUI()
+            return
+        self.setupConfigWatcher()
+        self.setupChildSupervisor()
+        self.setupInstrumentation()
         self.initUI()
+        startup_profiler.mark("构建窗口")
+        # 通过菜单“退出”时不会触发 closeEvent，同样要把排队中的配置写入磁盘
+        QApplication.instance().aboutToQuit.connect(self.config_manager.flush)
+        QApplication.instance().aboutToQuit.connect(launcher.stop_helper)
+        app = QApplication.instance()
+        app.screenAdded.connect(self.scheduleScreenReconcile)
+        app.screenRemoved.connect(self.scheduleScreenReconcile)
+        self.screen_change_connected = False
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        self.framePainted()
+
+    def framePainted(self):
+        # 单控件渲染模式下画布不透明，主窗口自身收不到绘制事件，由画布调用
+        if self.first_frame_shown: return
+        self.first_frame_shown = True
+        startup_profiler.mark("首帧绘制")
+        QTimer.singleShot(0, self.onFirstFrame)
+
+    def onFirstFrame(self):
+        # 首帧已经呈现，再做不影响首帧的工作：填充图标、检查输入法插件、开始索引应用
+        startup_profiler.mark("首帧呈现")
+        self.icons_ready = True
+        for i in range(self.grid.count): self.updateSlotDisplay(i)
+        self.schedulePrefetch()
+        if self.main_window: return
+        startup_profiler.mark("填充图标")
+        setup_fcitx5_im_plugin()
+        startup_profiler.mark("检查 Fcitx5 插件")
+        self.app_indexer.start()
+        self.running_monitor.start()
+        startup_profiler.report()
+
+    def setupChildSupervisor(self):
+        # 子进程退出时由 SIGCHLD 自管道唤醒事件循环，经辅助进程启动的子进程则由辅助进程的 socket 通知
+        self.child_supervisor = launcher.install_supervisor()
+        self.sigchld_notifier = QSocketNotifier(self.child_supervisor.wakeup_fd, QSocketNotifier.Read, self)
+        self.sigchld_notifier.activated.connect(self.reapChildren)
+        self.helper_notifier = None
+        helper = launcher.helper()
+        if helper:
+            self.helper_notifier = QSocketNotifier(helper.sock.fileno(), QSocketNotifier.Read, self)
+            self.helper_notifier.activated.connect(self.reapChildren)
+
+    def reapChildren(self):
+        changed = self.child_supervisor.reap()
+        for window in self.allWindows(): window.refreshRunningKeys(changed)
+        if self.helper_notifier and not launcher.helper():
+            self.helper_notifier.setEnabled(False)
+            self.helper_notifier = None
+
+    def onRunningAppsChanged(self, keys):
+        for window in self.allWindows(): window.refreshRunningKeys(keys)
+
+    def refreshRunningKeys(self, keys):
+        # 键为 key_prefix + (页, 格子)，只处理属于本窗口当前页的
+        for key in keys:
+            if key[:-2] != self.key_prefix: continue
+            page, slot_index = key[-2:]
+            if page == self.current_page and self.grid and slot_index < self.grid.count: self.updateRunningIndicator(slot_index)
+
+    def setupInstrumentation(self):
+        # kill -USR1 <pid> 导出计时数据；SIGCHLD 的自管道同样会唤醒事件循环，让 Python 层的处理函数及时执行
+        signal.signal(signal.SIGUSR1, lambda signum, frame: QTimer.singleShot(0, self.dumpTimings))
+
+    def dumpTimings(self, show_message=False):
+        try: path = instrumentation.dump()
+        except OSError as e:
+            print(f"Error writing timings: {e}")
+            return
+        print(f"Timings written to {path}", file=sys.stderr)
+        if show_message: QMessageBox.information(self, "性能数据", f"已导出到:\n{path}")
+
+    def setupControlServer(self, server):
+        self.control_server = ControlServer(server, self.handleControlCommand, self)
+        QApplication.instance().aboutToQuit.connect(self.control_server.close)
+
+    def handleControlCommand(self, command, args):
+        """处理经控制 socket 转发来的命令行命令，返回值作为应答内容。"""
+        if command in ('launch', 'page'):
+            try: number = int(args[0])
+            except ValueError: raise ValueError(f"无效的序号: {args[0]}")
+            if command == 'page':
+                if not 1 <= number <= self.PAGE_COUNT: raise ValueError(f"页码应在 1~{self.PAGE_COUNT} 之间")
+                self.setPage(number - 1)
+                return None
+            if not 1 <= number <= self.grid.count: raise ValueError(f"格子序号应在 1~{self.grid.count} 之间")
+            if not self.slots[number - 1]: raise ValueError(f"第 {number} 个格子是空的")
+            self.launchApp(number - 1)
+            return None
+        if command == 'reload':
+            self.reloadConfig()
+            return None
+        if command == 'show':
+            for window in self.allWindows():
+                window.show()
+                window.raise_()
+            self.activateWindow()
+            return None
+        if command == 'quit':
+            QTimer.singleShot(0, QApplication.instance().quit)
+            return None
+        return self.collectStats()
+
+    def reloadConfig(self):
+        # reload 用来接受外部修改：以磁盘上的内容为准，排队中的修改不再写出，否则会先覆盖掉用户刚编辑的文件
+        self.config_manager.discard_pending()
+        config_data = self.config_manager.load()
+        self.applyConfig(config_data)
+        self.applyScreenConfigs(config_data)
+
+    def setupConfigWatcher(self):
+        # 保存时 config.json 会被原子替换，文件监视随之失效，因此同时监视所在目录，并在每次变化后重新加入文件
+        config_path = str(self.config_manager.config_path)
+        self.config_watcher = QFileSystemWatcher(self)
+        self.config_watcher.addPath(str(self.config_manager.config_path.parent))
+        if os.path.exists(config_path): self.config_watcher.addPath(config_path)
+        self.config_reload_timer = QTimer(self)
+        self.config_reload_timer.setSingleShot(True)
+        self.config_reload_timer.setInterval(200)
+        self.config_reload_timer.timeout.connect(self.onConfigFileChanged)
+        self.config_watcher.fileChanged.connect(self.config_reload_timer.start)
+        self.config_watcher.directoryChanged.connect(self.config_reload_timer.start)
+
+    def onConfigFileChanged(self):
+        config_path = str(self.config_manager.config_path)
+        if os.path.exists(config_path) and config_path not in self.config_watcher.files():
+            self.config_watcher.addPath(config_path)
+        config_data = self.config_manager.load_external()
+        if config_data is None: return
+        self.applyConfig(config_data)
+        self.applyScreenConfigs(config_data)
+
+    def applyConfig(self, config_data):
+        """应用从磁盘读到的配置：与当前状态逐项比较，只重绘内容变化了的格子。"""
+        settings, pages = self.parseConfig(config_data)
+        old_pages, old_page = self.pages, self.current_page
+        self.pages = pages
+        self.current_page = self.clampPage(settings.get('page', 0))
+        for page_index, (old_page_slots, new_page_slots) in enumerate(zip(old_pages, pages)):
+            for slot_index in range(max(len(old_page_slots), len(new_page_slots))):
+                old = old_page_slots[slot_index] if slot_index < len(old_page_slots) else None
+                new = new_page_slots[slot_index] if slot_index < len(new_page_slots) else None
+                if (old or {}).get('exec') != (new or {}).get('exec'): self.child_supervisor.forget(self.key_prefix + (page_index, slot_index))
+        pos_data = settings.get('window_position')
+        if pos_data and (pos_data.get('x', 0), pos_data.get('y', 0)) != (self.x(), self.y()):
+            self.move(pos_data.get('x', 0), pos_data.get('y', 0))
+        if self.applyGeneralSettings(settings): return
+        self.ensureSlotCount(self.grid.count)
+        old_slots = old_pages[old_page]
+        for i in range(self.grid.count):
+            if old_page != self.current_page or i >= len(old_slots) or old_slots[i] != self.slots[i]:
+                self.updateSlotDisplay(i)
+                self.updateRunningIndicator(i)
+        if old_page != self.current_page: self.schedulePrefetch()
+
+    # --- 多显示器 ---
+    def mainWindow(self):
+        return self.main_window or self
+
+    def allWindows(self):
+        main_window = self.mainWindow()
+        return [main_window] + list(main_window.screen_windows.values())
+
+    def applyScreenConfigs(self, config_data):
+        # 外部修改或 reload 之后重新读取 screens，附加物品栏各自按其中的对应部分逐项更新
+        self.screen_configs = self.parseScreenConfigs(config_data)
+        for name, window in self.screen_windows.items():
+            if name in self.screen_configs: window.applyConfig(self.screen_configs[name])
+        self.scheduleScreenReconcile()
+
+    def scheduleScreenReconcile(self, *args):
+        QTimer.singleShot(0, self.reconcileScreens)
+
+    def reconcileScreens(self):
+        """开启“每个显示器”时，为主物品栏所在显示器以外的每个显示器维持一个附加物品栏；显示器移除后关闭对应窗口。"""
+        handle = self.windowHandle()
+        if handle and not self.screen_change_connected:
+            handle.screenChanged.connect(self.scheduleScreenReconcile)
+            self.screen_change_connected = True
+        wanted = {}
+        if self.settings.get('all_screens', False):
+            own_screen = handle.screen() if handle else QApplication.primaryScreen()
+            wanted = {screenName(screen): screen for screen in QApplication.screens() if screen is not own_screen}
+        for name in [name for name, window in self.screen_windows.items() if name not in wanted or window.target_screen is not wanted[name]]:
+            # 窗口关闭时保存一次，配置保留在 screens 中，显示器重新接入时恢复
+            window = self.screen_windows.pop(name)
+            self.screen_configs[name] = {'settings': window.settings, 'pages': window.pages}
+            window.close()
+            window.deleteLater()
+        for name, screen in wanted.items():
+            if name in self.screen_windows: continue
+            window = HotbarWindow(self, screen)
+            self.screen_windows[name] = window
+            window.show()
+
+    def collectStats(self):
+        return {
+            'pid': os.getpid(),
+            'screens': sorted(self.screen_windows),
+            'page': self.current_page + 1,
+            'slots': sum(1 for page in self.pages for app_info in page if app_info),
+            'icon_cache': self.icon_cache.stats(),
+            'icon_lookup': self.iconLookup().stats(),
+            'icon_loader': self.icon_loader.stats(),
+            'running_apps': self.running_monitor.stats(),
+            'prewarm': self.prewarmer.stats(),
+            'idle_trim': {'idle': [window.idle for window in self.allWindows()], 'recent': self.idle_trims[-5:]},
+            'timings': instrumentation.snapshot()['timings'] if instrumentation.enabled else None,
+            'sprites': self.sprites.stats(),
+            'desktop_entry_cache': desktop_entry.cache_stats(),
+            'config': {'writes': self.config_manager.writes, 'skipped': self.config_manager.skipped},
+            'app_index': len(self.app_indexer.index),
+            'launch': launcher.timing_stats(),
+            # 其他显示器上的格子键带有显示器名前缀：(显示器, 页, 格)
+            'running': {' '.join([*map(str, key[:-2]), f'{key[-2] + 1}:{key[-1] + 1}']): count
+                        for key, count in self.child_supervisor.running.items()},
+        }
 
     def initUI(self):
         self.setWindowTitle('HotBar')
         self.setAttribute(Qt.WA_TranslucentBackground)
         self.setMouseTracking(True)
-        central_widget = QWidget(self)
+        if not self.main_window: self.sprites = SpriteAtlas(resource_path(os.path.join('assets', 'sprites.atlas')), self.loadSprite)
+        self.applyGeneralSettings(self.settings, is_init=True)
+        if 'window_position' not in self.settings: self.centerWindow()
+
+    def setupRenderer(self):
+        # 'widgets'：背景、选中框和每个格子各是一个 QLabel；'painted'：由一个 HotbarCanvas 绘制全部内容
+        painted = self.settings.get('renderer', 'widgets') == 'painted'
+        if self.centralWidget() is not None and painted == (self.canvas is not None): return
+        central_widget = HotbarCanvas(self) if painted else QWidget(self)
         central_widget.setMouseTracking(True)
+        # 替换中央控件时，旧控件连同其中的格子 QLabel 一起被删除
         self.setCentralWidget(central_widget)
-        self.background_label = QLabel(self.centralWidget())
+        self.canvas = central_widget if painted else None
+        self.slot_labels = []
+        self.background_label = self.selection_label = None
+        if painted: return
+        self.background_label = QLabel(central_widget)
         self.background_label.setMouseTracking(True)
         self.background_label.setAcceptDrops(True)
-        self.original_pixmap = self.loadPixmap(self.findImagePath('hotbar.png'))
-        self.selection_pixmap = self.loadPixmap(self.findImagePath('hotbar_selection.png'))
         self.selection_label = QLabel(self.background_label)
         self.selection_label.setAttribute(Qt.WA_TransparentForMouseEvents)
         self.selection_label.hide()
-        self.slot_labels = []
-        for i in range(9):
-            slot_label = QLabel(self.background_label)
-            slot_label.setAlignment(Qt.AlignCenter)
-            slot_label.setAcceptDrops(True)
-            slot_label.setMouseTracking(True)
-            slot_label.setContextMenuPolicy(Qt.CustomContextMenu)
-            slot_label.customContextMenuRequested.connect(lambda point, index=i: self.showContextMenu(point, index))
-            slot_label.mousePressEvent = lambda event, index=i: self.slotClicked(event, index)
-            slot_label.dragEnterEvent = self.dragEnterEvent
-            slot_label.dropEvent = lambda event, index=i: self.dropEvent(event, index)
-            self.slot_labels.append(slot_label)
-        
-        self.applyGeneralSettings(self.settings, is_init=True)
-        if 'window_position' not in self.settings: self.centerWindow()
 
+    def createSlotLabel(self, index):
+        slot_label = QLabel(self.background_label)
+        slot_label.setAlignment(Qt.AlignCenter)
+        slot_label.setAcceptDrops(True)
+        slot_label.setMouseTracking(True)
+        slot_label.setContextMenuPolicy(Qt.CustomContextMenu)
+        slot_label.customContextMenuRequested.connect(
+            lambda point, index=index, label=slot_label: self.showContextMenu(label.mapToGlobal(point), index))
+        slot_label.mousePressEvent = lambda event, index=index: self.slotClicked(event, index)
+        slot_label.dragEnterEvent = self.dragEnterEvent
+        slot_label.dropEvent = lambda event, index=index: self.dropEvent(event, index)
+        # 仿照物品耐久条，在格子底部显示该应用是否正在运行
+        slot_label.running_bar = QLabel(slot_label)
+        slot_label.running_bar.setAttribute(Qt.WA_TransparentForMouseEvents)
+        slot_label.running_bar.setStyleSheet("background-color: #55FF55; border-bottom: 1px solid #1E6B1E;")
+        slot_label.running_bar.hide()
+        slot_label.show()
+        return slot_label
+
+    def ensureSlotCount(self, count):
+        # 缩小布局时保留多出来的格子数据，以便再次放大时恢复
+        for page in self.pages:
+            if len(page) < count: page.extend([None] * (count - len(page)))
+        if self.canvas: return
+        while len(self.slot_labels) < count:
+            self.slot_labels.append(self.createSlotLabel(len(self.slot_labels)))
+        while len(self.slot_labels) > count:
+            self.slot_labels.pop().deleteLater()
+
+    @instrumentation.timed('updateLayout')
     def updateLayout(self):
         scale = self.settings.get('scale', 3.0)
-        width = int(self.BASE_WIDTH * scale)
-        height = int(self.BASE_HEIGHT * scale)
+        self.grid = SlotGrid(self.settings.get('columns', 9), self.settings.get('rows', 1), scale)
+        self.ensureSlotCount(self.grid.count)
+        self.current_hover_slot = -1
+        self.last_hover_pos = None
+        width, height = self.grid.width, self.grid.height
         self.setFixedSize(width, height)
         self.centralWidget().setFixedSize(width, height)
-        self.background_label.setFixedSize(width, height)
-        if self.original_pixmap:
-            self.background_label.setPixmap(self.original_pixmap.scaled(width, height, Qt.IgnoreAspectRatio, Qt.FastTransformation))
-        for i, label in enumerate(self.slot_labels):
-            base_geom = self.SLOT_GEOMETRIES[i]
-            x, y, w, h = [int(val * scale) for val in base_geom]
-            label.setGeometry(x, y, w, h)
-        if self.selection_pixmap:
-            base_geom = self.SELECTION_GEOMETRIES[0]
-            w, h = int(base_geom[2] * scale), int(base_geom[3] * scale)
-            self.selection_label.setPixmap(self.selection_pixmap.scaled(w, h, Qt.IgnoreAspectRatio, Qt.FastTransformation))
-            self.selection_label.setFixedSize(w, h)
-        for i in range(9): self.updateSlotDisplay(i)
+        background = self.sprites.pixmap(self.grid.sprite_name, width, height)
+        w, h = scaledSpriteSize('hotbar_selection', scale)
+        selection = self.sprites.pixmap('hotbar_selection', w, h)
+        if self.canvas:
+            self.canvas.setGrid(self.grid, background, selection)
+        else:
+            self.selection_label.hide()
+            self.background_label.setFixedSize(width, height)
+            if background:
+                self.background_label.setPixmap(background)
+            for label, rect in zip(self.slot_labels, self.grid.slot_rects):
+                label.setGeometry(*rect)
+                w, h = rect[2], rect[3]
+                label.running_bar.setGeometry(int(w * 2 / 16), int(h * 13 / 16), int(w * 13 / 16), max(2, int(h * 2 / 16)))
+            if selection:
+                self.selection_label.setPixmap(selection)
+                self.selection_label.setFixedSize(*scaledSpriteSize('hotbar_selection', scale))
+        for i in range(self.grid.count):
+            self.updateSlotDisplay(i)
+            self.updateRunningIndicator(i)
+        self.schedulePrefetch()
+
+    # --- 多页 ---
+    @property
+    def slots(self):
+        return self.pages[self.current_page]
+
+    def slotKey(self, slot_index):
+        # 子进程按 (页, 格子) 归属，切换页面后仍能对应回原来的格子；附加物品栏的键前面再加上显示器名
+        return self.key_prefix + (self.current_page, slot_index)
+
+    def setPage(self, page):
+        page %= self.PAGE_COUNT
+        if page == self.current_page: return
+        self.current_page = page
+        for i in range(self.grid.count):
+            self.updateSlotDisplay(i)
+            self.updateRunningIndicator(i)
+        self.schedulePrefetch()
+        self.save_config()
+
+    def wheelEvent(self, event):
+        # 触控板会产生很多小幅度的滚动事件，累计满一格（120）才翻一页
+        self.wheel_delta += event.angleDelta().y()
+        steps = int(self.wheel_delta / 120)
+        if steps:
+            self.wheel_delta -= steps * 120
+            self.setPage(self.current_page - steps)
+        event.accept()
+
+    def keyPressEvent(self, event):
+        if Qt.Key_1 <= event.key() <= Qt.Key_9: self.setPage(event.key() - Qt.Key_1)
+        else: super().keyPressEvent(event)
+
+    def iconSize(self):
+        return int(self.grid.slot_rects[0][2] * 0.8)
+
+    def nearbyPages(self):
+        return [(self.current_page + d) % self.PAGE_COUNT for d in range(-self.PREFETCH_DISTANCE, self.PREFETCH_DISTANCE + 1)]
+
+    def neededIcons(self):
+        """本窗口当前页及相邻页用到的 (图标名, 尺寸)。"""
+        if self.grid is None or not self.icons_ready: return set()
+        size = self.iconSize()
+        return {(app_info['icon'], size) for p in self.nearbyPages() for app_info in self.pages[p][:self.grid.count]
+                if app_info and app_info.get('icon')}
+
+    def schedulePrefetch(self):
+        if self.grid is None or not self.icons_ready: return
+        size = self.iconSize()
+        nearby = self.nearbyPages()
+        # 图标缓存与加载器由各显示器的物品栏共用，其他窗口仍要用的图标不能丢弃或取消
+        keep = set().union(*(window.neededIcons() for window in self.allWindows()))
+        for page_index, page in enumerate(self.pages):
+            if page_index in nearby: continue
+            for app_info in page:
+                if app_info and app_info.get('icon') and (app_info['icon'], size) not in keep:
+                    self.icon_cache.discard(app_info['icon'], size)
+        # 其他尺寸（缩放已变）或已远离当前页的图标不再需要，取消它们的在途请求；相邻页的图标交给工作线程预先解码
+        self.icon_loader.cancel(lambda request: (request.icon_name, request.size) not in keep)
+        for page_index in nearby:
+            if page_index == self.current_page: continue
+            for app_info in self.pages[page_index][:self.grid.count]:
+                if app_info and app_info.get('icon'): self.icon_loader.request(app_info['icon'], size)
+
+    def onIconLoaded(self, icon_name, size):
+        if self.grid is None or size != self.iconSize(): return
+        for i in range(self.grid.count):
+            app_info = self.slots[i]
+            if app_info and app_info.get('icon') == icon_name: self.updateSlotDisplay(i)
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton and self.settings.get('is_movable', True):
             self.drag_position = event.globalPos() - self.frameGeometry().topLeft()
             event.accept()
-            
+
+
+    @instrumentation.timed('mouseMoveEvent')
     def mouseMoveEvent(self, event):
         if event.buttons() == Qt.LeftButton and hasattr(self, 'drag_position') and self.settings.get('is_movable', True):
             self.move(event.globalPos() - self.drag_position)
             event.accept()
         else:
-            pos = self.background_label.mapFromGlobal(event.globalPos())
-            scale = self.settings.get('scale', 3.0)
-            hover_found = False
-            for i in range(9):
-                base_geom = self.SELECTION_GEOMETRIES[i]
-                x, y, w, h = [int(val * scale) for val in base_geom]
-                if x <= pos.x() < x + w and y <= pos.y() < y + h:
-                    if self.current_hover_slot != i:
-                        self.selection_label.move(x, y)
-                        self.selection_label.show()
-                        self.selection_label.raise_()
-                        self.current_hover_slot = i
-                    hover_found = True
-                    break
-            if not hover_found and self.current_hover_slot != -1:
-                self.selection_label.hide()
-                self.current_hover_slot = -1
+            pos = self.centralWidget().mapFromGlobal(event.globalPos())
+            # 同一位置的重复移动事件（子控件转发上来的等）直接跳过
+            if pos != self.last_hover_pos:
+                self.last_hover_pos = pos
+                self.updateHover(self.grid.hitTest(pos.x(), pos.y()))
         super().mouseMoveEvent(event)
 
+    def updateHover(self, slot_index):
+        if slot_index == self.current_hover_slot: return
+        self.current_hover_slot = slot_index
+        # 悬停通常比点击早几百毫秒，可按设置趁这段时间让内核预读程序及其依赖库
+        if slot_index >= 0 and self.settings.get('prewarm_on_hover', False) and self.slots[slot_index]:
+            self.prewarmer.request(self.slotKey(slot_index), self.slots[slot_index].get('exec'))
+        if self.canvas:
+            self.canvas.setHover(slot_index)
+            return
+        if slot_index < 0:
+            self.selection_label.hide()
+            return
+        x, y = self.grid.selection_rects[slot_index][:2]
+        self.selection_label.move(x, y)
+        self.selection_label.show()
+        self.selection_label.raise_()
+
     def mouseReleaseEvent(self, event):
         if hasattr(self, 'drag_position'):
             delattr(self, 'drag_position')
@@ -345,41 +1633,114 @@ class HotbarWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.save_config()
+        self.config_manager.flush()
+        if not self.main_window:
+            for window in list(self.screen_windows.values()): window.close()
         super().closeEvent(event)
 
+    @instrumentation.timed('save_config')
     def save_config(self):
         pos = self.pos()
         self.settings['window_position'] = {'x': pos.x(), 'y': pos.y()}
-        config_data = {'settings': self.settings, 'slots': self.slots}
+        self.settings['page'] = self.current_page
+        # 所有物品栏写入同一个 config.json，由主物品栏汇总
+        if self.main_window:
+            self.main_window.save_config()
+            return
+        config_data = {'settings': self.settings, 'pages': self.pages}
+        for name, window in self.screen_windows.items():
+            self.screen_configs[name] = {'settings': window.settings, 'pages': window.pages}
+        if self.screen_configs: config_data['screens'] = self.screen_configs
         self.config_manager.save(config_data)
 
+    def parseConfig(self, config_data):
+        settings = {'level': 0, 'is_movable': True, 'scale': 3.0, 'columns': 9, 'rows': 1}
+        settings.update(config_data.get('settings', {}))
+        # 旧版本的配置只有一页 slots
+        pages = config_data.get('pages') or [config_data.get('slots', [None] * 9)]
+        pages = (pages + [[None] * 9 for _ in range(self.PAGE_COUNT)])[:self.PAGE_COUNT]
+        return settings, pages
+
+    def parseScreenConfigs(self, config_data):
+        screens = config_data.get('screens')
+        if not isinstance(screens, dict): return {}
+        return {name: section for name, section in screens.items() if isinstance(section, dict)}
+
+    def clampPage(self, page):
+        try: return min(max(int(page), 0), self.PAGE_COUNT - 1)
+        except (TypeError, ValueError): return 0
+
     def load_config(self):
-        config_data = self.config_manager.load()
-        self.settings = {'level': 0, 'is_movable': True, 'scale': 3.0}
-        self.settings.update(config_data.get('settings', {}))
-        self.slots = config_data.get('slots', [None] * 9)
+        if self.main_window:
+            config_data = self.main_window.screen_configs.get(self.screen_name)
+            if config_data is None:
+                main_settings = self.main_window.settings
+                config_data = {'settings': {key: main_settings[key] for key in self.SCREEN_INHERITED_SETTINGS if key in main_settings}}
+        else:
+            config_data = self.config_manager.load()
+            self.screen_configs = self.parseScreenConfigs(config_data)
+        self.settings, self.pages = self.parseConfig(config_data)
+        self.current_page = self.clampPage(self.settings.get('page', 0))
         pos_data = self.settings.get('window_position')
         if pos_data: self.move(pos_data.get('x', 0), pos_data.get('y', 0))
 
     def removeFromHotbar(self, slot_index):
         self.slots[slot_index] = None
+        self.child_supervisor.forget(self.slotKey(slot_index))
         self.updateSlotDisplay(slot_index)
+        self.updateRunningIndicator(slot_index)
         self.save_config()
 
     def processDesktopFile(self, file_path, slot_index):
         try:
-            with open(file_path, 'r', encoding='utf-8') as f: content = f.read()
-            app_info = self.parseDesktopFile(content)
+            entry = desktop_entry.load(file_path)
+            app_info = {key: entry[key] for key in self.SLOT_ENTRY_FIELDS if key in entry}
             if app_info and app_info.get('exec'):
                 app_info['path'] = file_path
                 self.slots[slot_index] = app_info
+                self.child_supervisor.forget(self.slotKey(slot_index))
+                self.updateRunningIndicator(slot_index)
                 self.updateSlotDisplay(slot_index)
                 self.save_config()
         except Exception as e: QMessageBox.critical(self, "错误", f"读取文件失败: {str(e)}")
 
+    def importDesktopFiles(self, sources, slot_index):
+        """把 sources 中的应用依次放入 slot_index 及其后的空格子，全部完成后只保存一次配置。"""
+        if self.desktop_import is not None:
+            QMessageBox.information(self, "提示", "上一批应用还在导入中")
+            return
+        page = self.current_page
+        targets = [slot_index] + [i for i in range(slot_index + 1, self.grid.count) if not self.slots[i]]
+        original = {slot: self.slots[slot] for slot in targets}
+        exclude_ids = {desktop_id(app_info['path']) for app_info in self.slots if app_info and app_info.get('path')}
+        importer = self.desktop_import = DesktopImporter(sources, len(targets), exclude_ids, self)
+        placed = []
+        def place(app_info):
+            # 导入期间用户可能已经往目标格子里放了别的应用，跳过这些格子
+            while targets and self.pages[page][targets[0]] is not original[targets[0]]: targets.pop(0)
+            if not targets:
+                importer.stop()
+                return
+            slot = targets.pop(0)
+            placed.append(slot)
+            self.pages[page][slot] = app_info
+            self.child_supervisor.forget(self.key_prefix + (page, slot))
+            if page == self.current_page and slot < self.grid.count:
+                self.updateRunningIndicator(slot)
+                self.updateSlotDisplay(slot)
+        def finish(imported, skipped):
+            self.desktop_import = None
+            importer.deleteLater()
+            if placed: self.save_config()
+            elif not imported: QMessageBox.warning(self, "错误", "没有找到可以导入的应用")
+        importer.entryReady.connect(place)
+        importer.finished.connect(finish)
+        importer.start()
+
     def openSlotSettings(self, slot_index):
         app_info = self.slots[slot_index]
         if not app_info: return
+        from dialogs import SlotSettingsDialog
         dialog = SlotSettingsDialog(app_info.get('name', ''), app_info.get('icon', ''), self)
         if dialog.exec_() == QDialog.Accepted:
             new_name, new_icon = dialog.get_data()
@@ -388,9 +1749,18 @@ class HotbarWindow(QMainWindow):
             self.updateSlotDisplay(slot_index)
             self.save_config()
 
+    def openAppSearch(self, slot_index):
+        from dialogs import AppSearchDialog
+        dialog = AppSearchDialog(self.app_indexer, self)
+        if dialog.exec_() == QDialog.Accepted and dialog.get_path():
+            self.processDesktopFile(dialog.get_path(), slot_index)
+
     def openGeneralSettings(self):
         if self.general_settings_dialog is None:
-            self.general_settings_dialog = GeneralSettingsDialog(self.settings, self)
+            from dialogs import GeneralSettingsDialog
+            main_settings = self.mainWindow().settings
+            settings = dict(self.settings, **{key: main_settings[key] for key in self.PROCESS_SETTINGS if key in main_settings})
+            self.general_settings_dialog = GeneralSettingsDialog(settings, self)
             self.general_settings_dialog.settingsChanged.connect(self.applyGeneralSettings)
             self.general_settings_dialog.finished.connect(self.on_general_settings_closed)
             self.general_settings_dialog.show()
@@ -403,105 +1773,188 @@ class HotbarWindow(QMainWindow):
         self.save_config()
 
     def applyGeneralSettings(self, new_settings, is_init=False):
+        """合并新的设置，只做发生变化的设置所需的工作。返回是否重新布局。"""
+        if self.main_window:
+            new_settings = dict(new_settings)
+            process_settings = {key: new_settings.pop(key) for key in self.PROCESS_SETTINGS if key in new_settings}
+            if process_settings and not is_init:
+                # 关闭“每个显示器”会关掉本窗口，留到设置对话框的信号处理完之后再做
+                QTimer.singleShot(0, lambda: self.main_window.applyGeneralSettings(process_settings))
+        changed = {key for key, value in new_settings.items() if self.settings.get(key) != value}
         self.settings.update(new_settings)
+        if is_init or 'level' in changed: self.applyWindowLevel(is_init)
+        if is_init or 'renderer' in changed: self.setupRenderer()
+        if is_init or 'idle_trim_minutes' in changed: self.restartIdleTimer()
+        if not self.main_window:
+            if is_init or 'instrumentation' in changed: instrumentation.configure(self.settings.get('instrumentation', False))
+            if is_init or 'all_screens' in changed: self.scheduleScreenReconcile()
+        if is_init or changed.intersection(self.LAYOUT_SETTINGS):
+            self.updateLayout()
+            return True
+        return False
+
+    def applyWindowLevel(self, is_init=False):
         level = self.settings.get('level', 0)
-        flags = Qt.FramelessWindowHint
+        flags = Qt.Window | Qt.FramelessWindowHint
         if level == 0: flags |= Qt.WindowStaysOnTopHint
         elif level == 2: flags |= Qt.WindowStaysOnBottomHint
-        if self.windowFlags() != flags:
+        if self.windowFlags() == flags: return
+        handle = self.windowHandle()
+        if is_init or handle is None:
             self.setWindowFlags(flags)
-            if not is_init: self.show()
-        self.updateLayout()
+            return
+        # setWindowFlags 会销毁并重建原生窗口；窗口已存在时只把新的层级提示交给原生窗口，由窗口管理器就地调整
+        self.overrideWindowFlags(flags)
+        handle.setFlags(flags)
+
+    def enterEvent(self, event):
+        self.running_monitor.poke()
+        if self.idle: self.leaveIdle()
+        self.idle_timer.stop()
+        super().enterEvent(event)
 
     def leaveEvent(self, event):
-        self.selection_label.hide()
-        self.current_hover_slot = -1
+        self.updateHover(-1)
+        self.last_hover_pos = None
+        self.restartIdleTimer()
         super().leaveEvent(event)
-        
-    def showContextMenu(self, point, slot_index):
+
+    # --- 空闲释放内存 ---
+    def restartIdleTimer(self):
+        minutes = self.settings.get('idle_trim_minutes', 30)
+        if minutes and minutes > 0: self.idle_timer.start(int(minutes * 60000))
+        else: self.idle_timer.stop()
+
+    def setChildMouseTracking(self, enabled):
+        self.centralWidget().setMouseTracking(enabled)
+        if self.background_label: self.background_label.setMouseTracking(enabled)
+        for label in self.slot_labels: label.setMouseTracking(enabled)
+
+    def enterIdle(self):
+        """
+        长时间无操作（如作为桌面部件放在底层）时释放可重建的内存：选中框、缓存的右键菜单、缩放后的精灵与原图、其他页的图标、
+        .desktop 与图标主题的缓存，并关闭子控件的鼠标追踪，最后调用 malloc_trim。正在显示的背景与图标保留。
+        多个显示器上的物品栏共用缓存，等它们都进入空闲后才释放共用的部分。
+        """
+        if self.idle or self.grid is None: return
+        # 鼠标仍在窗口内、菜单或对话框打开、正在导入时推迟
+        if self.underMouse() or QApplication.activePopupWidget() or QApplication.activeModalWidget() \
+                or self.general_settings_dialog or self.desktop_import:
+            self.restartIdleTimer()
+            return
+        self.idle = True
+        self.setChildMouseTracking(False)
+        self.updateHover(-1)
+        if self.canvas: self.canvas.selection = None
+        else: self.selection_label.clear()
+        self.releaseContextMenus()
+        windows = self.allWindows()
+        if all(window.idle for window in windows): self.mainWindow().trimSharedCaches(windows)
+
+    def trimSharedCaches(self, windows):
+        rss_before = memory_trim.rss_bytes()
+        self.icon_loader.cancel()
+        self.icon_cache.retain({app_info['icon'] for window in windows if window.grid
+                                for app_info in window.slots[:window.grid.count] if app_info and app_info.get('icon')})
+        self.sprites.trim()
+        desktop_entry.clear_cache()
+        if self.icon_lookup: self.icon_lookup.close()
+        gc.collect()
+        trimmed = memory_trim.malloc_trim()
+        rss_after = memory_trim.rss_bytes()
+        record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'malloc_trim': trimmed,
+                  'rss_before_mb': round(rss_before / 1048576, 1) if rss_before else None,
+                  'rss_after_mb': round(rss_after / 1048576, 1) if rss_after else None}
+        self.idle_trims = self.idle_trims[-9:] + [record]
+        print(f"空闲释放内存: RSS {record['rss_before_mb']} MB -> {record['rss_after_mb']} MB", file=sys.stderr)
+
+    def leaveIdle(self):
+        # 只恢复空闲时释放的部分；其他页的图标等到需要时再按需加载
+        self.idle = False
+        self.setChildMouseTracking(True)
+        selection = self.sprites.pixmap('hotbar_selection', *scaledSpriteSize('hotbar_selection', self.grid.scale))
+        if self.canvas: self.canvas.selection = selection
+        elif selection: self.selection_label.setPixmap(selection)
+        self.schedulePrefetch()
+
+
+    # --- 右键菜单 ---
+    def bookMenuStyle(self):
+        # 样式表与书本背景的路径对所有菜单都相同，整个进程只查找、格式化一次；没有 book.png 时为空
+        main_window = self.mainWindow()
+        if main_window.book_menu_style is None:
+            path = self.findImagePath('book.png')
+            main_window.book_menu_style = BOOK_MENU_STYLE.format(path=path.replace('\\', '/')) if path else ''
+        return main_window.book_menu_style
+
+    def contextMenu(self, filled):
+        """
+        返回缓存的右键菜单，空格子和有应用的格子各一个，第一次右键时创建。
+        菜单项通过 self.menu_slot 找到目标格子，每次打开只需更新标题文字。
+        """
+        menu = self.context_menus.get(filled)
+        if menu is not None: return menu
+        menu = QMenu(self)
+        menu.setAttribute(Qt.WA_TranslucentBackground)
+        menu.title_action = menu.addAction("" if filled else "空白物品栏")
+        menu.title_action.setEnabled(False)
+        if filled:
+            menu.addAction("启动应用", lambda: self.launchApp(self.menu_slot))
+            menu.addAction("从物品栏移除", lambda: self.removeFromHotbar(self.menu_slot))
+            menu.addAction("此物品栏设置...", lambda: self.openSlotSettings(self.menu_slot))
+        else:
+            menu.addAction("搜索应用...", lambda: self.openAppSearch(self.menu_slot))
+            menu.addAction("拖放desktop文件").setEnabled(False)
+        menu.addAction("总设置...", self.openGeneralSettings)
+        menu.timings_action = menu.addAction("导出性能数据", lambda: self.dumpTimings(show_message=True))
+        menu.addAction("退出", QApplication.instance().quit)
+        stylesheet = self.bookMenuStyle()
+        if stylesheet: menu.setStyleSheet(stylesheet)
+        self.context_menus[filled] = menu
+        return menu
+
+    def releaseContextMenus(self):
+        for menu in self.context_menus.values(): menu.deleteLater()
+        self.context_menus = {}
+
+    def showContextMenu(self, global_pos, slot_index):
+        # 打开耗时从右键到菜单第一次绘制完成
+        opened_ns = time.perf_counter_ns() if instrumentation.enabled else None
         app_info = self.slots[slot_index]
-        context_menu = QMenu(self)
-        context_menu.setAttribute(Qt.WA_TranslucentBackground)
-        
-        general_settings_action = QAction("总设置...", self)
-        general_settings_action.triggered.connect(self.openGeneralSettings)
-        quit_action = QAction("退出", self)
-        quit_action.triggered.connect(QApplication.instance().quit)
-        
+        context_menu = self.contextMenu(bool(app_info))
         if app_info:
-            title_action = QAction(app_info.get('name', '未知应用'), self)
-            title_action.setEnabled(False)
-            launch_action = QAction("启动应用", self)
-            launch_action.triggered.connect(lambda: self.launchApp(slot_index))
-            remove_action = QAction("从物品栏移除", self)
-            remove_action.triggered.connect(lambda: self.removeFromHotbar(slot_index))
-            slot_settings_action = QAction("此物品栏设置...", self)
-            slot_settings_action.triggered.connect(lambda: self.openSlotSettings(slot_index))
-            context_menu.addAction(title_action)
-            context_menu.addAction(launch_action)
-            context_menu.addAction(remove_action)
-            context_menu.addAction(slot_settings_action)
-        else:
-            title_action = QAction("空白物品栏", self)
-            title_action.setEnabled(False)
-            add_app_action = QAction("拖放desktop文件", self)
-            add_app_action.setEnabled(False)
-            context_menu.addAction(title_action)
-            context_menu.addAction(add_app_action)
-            
-        context_menu.addAction(general_settings_action)
-        context_menu.addAction(quit_action)
-        
-        book_image_path = self.findImagePath('book.png')
-        if book_image_path:
-            book_image_path = book_image_path.replace('\\', '/')
-            context_menu.setFixedSize(150, 184)
-            
-            stylesheet = f"""
-                QMenu {{
-                    background-color: transparent;
-                    background-image: url({book_image_path});
-                    background-repeat: no-repeat;
-                    background-position: center;
-                    border: none;
-                }}
-                QMenu::item {{
-                    color: #402A18;
-                    background-color: transparent;
-                    padding: 3px 25px;
-                    margin: 2px 0px;
-                    font-weight: 500;
-                }}
-                QMenu::item:selected {{
-                    color: #000000;
-                    font-weight: bold;
-                    background-color: rgba(0, 0, 0, 0.05);
-                    border-radius: 3px;
-                }}
-                QMenu::item:disabled {{
-                    color: #000000;
-                    font-weight: bold;
-                    padding-top: 18px;
-                    padding-bottom: 5px;
-                }}
-            """
-            context_menu.setStyleSheet(stylesheet)
-            
-        context_menu.exec_(self.slot_labels[slot_index].mapToGlobal(point))
-        
+            title = app_info.get('name', '未知应用')
+            if self.bookMenuStyle():
+                # 标题为粗体、左右各留 25px；过长的名称截断，书本只随条目数变高而不被拉宽
+                font = QFont(context_menu.font())
+                font.setBold(True)
+                title = QFontMetrics(font).elidedText(title, Qt.ElideRight, BOOK_MENU_SIZE[0] - 50)
+            context_menu.title_action.setText(title)
+        context_menu.timings_action.setVisible(instrumentation.enabled)
+        self.menu_slot = slot_index
+        if self.bookMenuStyle():
+            # 条目数与标题长度会变，按当前内容放大菜单，而不是裁掉底部的条目
+            hint = context_menu.sizeHint()
+            context_menu.setFixedSize(max(BOOK_MENU_SIZE[0], hint.width()), max(BOOK_MENU_SIZE[1], hint.height()))
+        if opened_ns is not None: FirstPaintTimer(context_menu, 'showContextMenu', opened_ns)
+        context_menu.exec_(global_pos)
+
+    @instrumentation.timed('updateSlotDisplay')
     def updateSlotDisplay(self, slot_index):
-        slot_label = self.slot_labels[slot_index]
+        if self.grid is None or not self.icons_ready: return
         app_info = self.slots[slot_index]
-        if slot_label.width() == 0: return
-        icon_size = int(slot_label.width() * 0.8)
+        pixmap = None
+        # 图标尚未加载好时先显示名称的前两个字，加载完成后由 onIconLoaded 再次更新
         if app_info and app_info.get('icon'):
-            icon = self.getBestIcon(app_info['icon'])
-            if icon:
-                pixmap = icon.pixmap(QSize(icon_size, icon_size))
-                if not pixmap.isNull():
-                    slot_label.setPixmap(pixmap)
-                    slot_label.setText("")
-                    return
+            pixmap, _ = self.icon_loader.request(app_info['icon'], self.iconSize())
+        if self.canvas:
+            self.canvas.setSlotContent(slot_index, pixmap, app_info.get('name', '')[:2] if app_info else '')
+            return
+        slot_label = self.slot_labels[slot_index]
+        if pixmap:
+            slot_label.setPixmap(pixmap)
+            slot_label.setText("")
+            return
         slot_label.clear()
         if app_info and app_info.get('name'):
             slot_label.setText(app_info['name'][:2])
@@ -509,19 +1962,32 @@ class HotbarWindow(QMainWindow):
             slot_label.setStyleSheet(f"background-color: transparent; color: white; font-weight: bold; font-size: {font_size}px;")
         else: slot_label.setText("")
         
-    def getBestIcon(self, icon_name):
-        icon = None
-        if icon_name and QIcon.hasThemeIcon(icon_name):
-            icon = QIcon.fromTheme(icon_name)
-            if not icon.isNull(): return icon
-        if icon_name and (icon_name.startswith('/') or icon_name.startswith('.')) and os.path.exists(icon_name):
-            icon = QIcon(icon_name)
+    def iconLookup(self):
+        if self.main_window: return self.main_window.iconLookup()
+        # 主题或搜索路径变化（如切换了系统图标主题）时重新建立查找器
+        theme, search_paths = QIcon.themeName(), QIcon.themeSearchPaths()
+        lookup = self.icon_lookup
+        if lookup is None or lookup.theme_name != theme or lookup.search_paths != search_paths:
+            self.icon_lookup = lookup = IconLookup(theme, search_paths)
+        return lookup
+
+    def getBestIcon(self, icon_name, size=48):
+        if not icon_name: return None
+        if icon_name.startswith('/') or icon_name.startswith('.'):
+            icon = QIcon(icon_name) if os.path.exists(icon_name) else None
+            return icon if icon and not icon.isNull() else None
+        # 主题图标经 icon-theme.cache（或自建索引）哈希查找到具体文件，不再由 Qt 遍历主题目录树
+        app = QApplication.instance()
+        lookup = self.iconLookup()
+        path = lookup.lookup(icon_name, int(size * (app.devicePixelRatio() if app else 1.0)))
+        if path:
+            icon = QIcon(path)
             if not icon.isNull(): return icon
-        pixmap_path = f"/usr/share/pixmaps/{icon_name}.png"
-        if os.path.exists(pixmap_path):
-            icon = QIcon(pixmap_path)
+        # 找不到任何可用主题目录时（例如主题由平台插件提供），仍交给 Qt 查找
+        if not lookup.themes and QIcon.hasThemeIcon(icon_name):
+            icon = QIcon.fromTheme(icon_name)
             if not icon.isNull(): return icon
-        return icon if icon and not icon.isNull() else None
+        return None
         
     def findImagePath(self, image_name):
         try:
@@ -542,6 +2008,29 @@ class HotbarWindow(QMainWindow):
         return None
 
 
+    def loadSprite(self, name):
+        if '@' not in name: return self.loadPixmap(self.findImagePath(f'{name}.png'))
+        columns, rows = map(int, name.split('@', 1)[1].split('x'))
+        return self.composeBackground(columns, rows)
+
+    def composeBackground(self, columns, rows):
+        # 按 20px 的格子周期从 hotbar.png 中取格：首列用第 0 格，末列用第 8 格，中间列循环使用第 1~7 格
+        source = self.sprites.source('hotbar')
+        if source is None: return None
+        cell_w, cell_h = SlotGrid.CELL_WIDTH, SlotGrid.CELL_HEIGHT
+        pixmap = QPixmap(cell_w * columns + 2, cell_h * rows)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        for row in range(rows):
+            for col in range(columns):
+                if col == 0: source_col = 0
+                elif col == columns - 1: source_col = 8
+                else: source_col = 1 + (col - 1) % 7
+                painter.drawPixmap(col * cell_w, row * cell_h, source, source_col * cell_w, 0, cell_w, cell_h)
+            painter.drawPixmap(columns * cell_w, row * cell_h, source, 9 * cell_w, 0, 2, cell_h)
+        painter.end()
+        return pixmap
+
     def loadPixmap(self, path, fallback_func=None):
         if path:
             pixmap = QPixmap(path)
@@ -554,56 +2043,103 @@ class HotbarWindow(QMainWindow):
         print("未找到 hotbar.png，使用备用背景")
         
     def centerWindow(self):
-        screen_geometry = QApplication.primaryScreen().availableGeometry()
-        self.move((screen_geometry.width() - self.width()) // 2, screen_geometry.height() - self.height() - 40)
+        screen_geometry = (self.target_screen or QApplication.primaryScreen()).availableGeometry()
+        self.move(screen_geometry.x() + (screen_geometry.width() - self.width()) // 2,
+                  screen_geometry.y() + screen_geometry.height() - self.height() - 40)
         
     def slotClicked(self, event, slot_index):
         if event.button() == Qt.LeftButton: self.launchApp(slot_index)
         
-    def launchApp(self, slot_index):
+    def refreshSlotEntry(self, slot_index):
         app_info = self.slots[slot_index]
+        desktop_path = app_info.get('path') if app_info else None
+        if not desktop_path: return app_info
+        try: entry = desktop_entry.load(desktop_path)
+        except OSError: return app_info  # .desktop 文件已被删除时沿用格子中保存的副本
+        if not entry.get('exec'): return app_info
+        changed = False
+        for key in self.LAUNCH_ENTRY_FIELDS:
+            if entry.get(key) != app_info.get(key):
+                if key in entry: app_info[key] = entry[key]
+                else: app_info.pop(key, None)
+                changed = True
+        if changed: self.save_config()
+        return app_info
+
+    @instrumentation.timed('launchApp')
+    def launchApp(self, slot_index, files=()):
+        # 拖入文件时总是交给应用打开；单击已在运行的应用时，可按设置切换到它的窗口或不再重复启动
+        key = self.slotKey(slot_index)
+        external = self.running_monitor.running.get(key)
+        if not files and (self.child_supervisor.running.get(key) or external):
+            if self.settings.get('activate_running', False) and external:
+                # 切换不成功（如没有可见窗口）时再按“不重复启动”的设置处理
+                self.running_monitor.activate(key, external, lambda: self.launchRunningApp(slot_index, key))
+                return
+            if self.settings.get('skip_running_launch', False): return
+        self.startApp(slot_index, files)
+
+    def launchRunningApp(self, slot_index, key):
+        if self.settings.get('skip_running_launch', False) or key != self.slotKey(slot_index): return
+        self.startApp(slot_index)
+
+    def startApp(self, slot_index, files=()):
+        app_info = self.refreshSlotEntry(slot_index)
         if app_info and app_info.get('exec'):
             try:
-                exec_command = app_info['exec'].split('%')[0].strip()
-                user_home_dir = str(Path.home()) 
-                subprocess.Popen(
-                    ['nohup', 'sh', '-c', exec_command, '&'],
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.DEVNULL,
-                    start_new_session=True,
-                    cwd=user_home_dir
-                )
+                launcher.launch(app_info, files, key=self.slotKey(slot_index))
             except Exception as e:
                 QMessageBox.critical(self, "错误", f"启动应用失败: {str(e)}")
+            self.updateRunningIndicator(slot_index)
+
+    def updateRunningIndicator(self, slot_index):
+        app_info = self.slots[slot_index]
+        key = self.slotKey(slot_index)
+        running = self.child_supervisor.running.get(key, 0)
+        external = bool(app_info) and key in self.running_monitor.running
+        tooltip = ""
+        if app_info:
+            tooltip = app_info.get('name', '')
+            if running: tooltip += f"\n运行中: {running}"
+            elif external: tooltip += "\n已在运行"
+            elif self.child_supervisor.exit_codes.get(key) is not None:
+                tooltip += f"\n上次退出码: {self.child_supervisor.exit_codes[key]}"
+        if self.canvas:
+            self.canvas.setRunning(slot_index, running > 0 or external, tooltip)
+            return
+        slot_label = self.slot_labels[slot_index]
+        slot_label.running_bar.setVisible(running > 0 or external)
+        slot_label.setToolTip(tooltip)
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls(): event.acceptProposedAction()
         
     def dropEvent(self, event, slot_index):
         urls = event.mimeData().urls()
         if urls:
-            file_path = urls[0].toLocalFile()
-            if file_path.endswith('.desktop'): self.processDesktopFile(file_path, slot_index)
-            else: QMessageBox.warning(self, "错误", "请拖放 .desktop 文件")
-            
+            local_paths = [url.toLocalFile() for url in urls if url.isLocalFile()]
+            sources = [path for path in local_paths if path.endswith('.desktop') or (os.path.isdir(path) and containsDesktopFiles(path))]
+            if len(urls) == 1 and len(sources) == 1 and not os.path.isdir(sources[0]): self.processDesktopFile(sources[0], slot_index)
+            # 多个 .desktop 文件或应用目录（如 /usr/share/applications）从这个格子开始依次填入空格子
+            elif sources: self.importDesktopFiles(sources, slot_index)
+            # 把普通文件拖到已有应用的格子上，用该应用打开（按 Exec 中的 %f/%F/%u/%U 传入）
+            elif self.slots[slot_index]:
+                self.launchApp(slot_index, [url.toLocalFile() if url.isLocalFile() else url.toString() for url in urls])
+            else: QMessageBox.warning(self, "错误", "请拖放 .desktop 文件或包含它们的目录")
+
+
     def parseDesktopFile(self, content):
-        app_info = {}
-        for line in content.split('\n'):
-            if '=' in line:
-                key, value = line.split('=', 1)
-                if key.strip() == 'Name': app_info['name'] = value.strip()
-                elif key.strip() == 'Icon': app_info['icon'] = value.strip()
-                elif key.strip() == 'Exec': app_info['exec'] = value.strip()
-        return app_info
+        return desktop_entry.parse(content)
 
 def main():
-    # 在启动 QApplication 之前，执行插件注入逻辑
-    setup_fcitx5_im_plugin()
-
+    # Fcitx5 插件检查推迟到首帧之后（HotbarWindow.onFirstFrame）；首次注入的插件在下次启动时生效
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
     app = QApplication(sys.argv)
+    startup_profiler.mark("创建 QApplication")
     window = HotbarWindow()
+    if control_socket is not None: window.setupControlServer(control_socket)
     window.show()
+    startup_profiler.mark("window.show()")
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
@@ -0,0 +1,29 @@
+"""
+空闲时归还内存。
+
+rss_bytes() 从 /proc/self/statm 读取当前常驻内存，malloc_trim() 让 glibc 把空闲的堆内存还给系统
+（其他 C 库没有该函数时什么都不做）。本模块不依赖 Qt。
+"""
+import os
+import ctypes
+import ctypes.util
+
+_libc = None
+
+def rss_bytes():
+    """当前进程的常驻内存字节数，无法读取时返回 None。"""
+    try:
+        with open('/proc/self/statm', 'rb') as f: resident = int(f.read().split()[1])
+        return resident * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError): return None
+
+def malloc_trim():
+    """调用 malloc_trim(0)，返回是否调用成功。"""
+    global _libc
+    try:
+        if _libc is None: _libc = ctypes.CDLL(ctypes.util.find_library('c') or None)
+        trim = _libc.malloc_trim
+    except (OSError, AttributeError): return False
+    trim.argtypes = [ctypes.c_size_t]
+    trim(0)
+    return True
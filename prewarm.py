@@ -0,0 +1,215 @@
+"""
+悬停预热。
+
+鼠标停到格子上往往比点击早几百毫秒。Prewarmer 在后台线程中解析该格子的程序：读取 ELF 动态段的
+DT_NEEDED / DT_RUNPATH，按动态链接器的搜索顺序找到全部依赖库（结果按文件 mtime 缓存，相当于缓存的 ldd 输出），
+脚本则改为其解释器，然后对这些文件调用 posix_fadvise(WILLNEED) 让内核提前把它们读入页缓存，
+重启后第一次启动大型应用时可以少等一些磁盘读取。同一格子在 REPEAT_AFTER 秒内只预热一次，
+同一时间最多只有一个待处理的请求（新的悬停替换旧的）。本模块不依赖 Qt。
+"""
+import os
+import glob
+import shutil
+import struct
+import threading
+import time
+
+import proc_scan
+
+DT_NEEDED, DT_STRTAB, DT_RPATH, DT_RUNPATH = 1, 5, 15, 29
+PT_LOAD, PT_DYNAMIC = 1, 2
+REPEAT_AFTER = 600.0
+MIN_INTERVAL = 0.2
+MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_LIB_DIRS = ('/lib64', '/usr/lib64', '/lib', '/usr/lib')
+
+def read_elf(path):
+    """返回 (DT_NEEDED 列表, RUNPATH/RPATH 目录列表)；不是 ELF 或没有动态段时返回 None。"""
+    with open(path, 'rb') as f:
+        ident = f.read(64)
+        if len(ident) < 52 or ident[:4] != b'\x7fELF': return None
+        is64, endian = ident[4] == 2, '<' if ident[5] == 1 else '>'
+        if is64:
+            phoff, = struct.unpack_from(endian + 'Q', ident, 32)
+            phentsize, phnum = struct.unpack_from(endian + 'HH', ident, 54)
+            ph_format, dyn_format = endian + 'IIQQQQQQ', endian + 'qQ'
+        else:
+            phoff, = struct.unpack_from(endian + 'I', ident, 28)
+            phentsize, phnum = struct.unpack_from(endian + 'HH', ident, 42)
+            ph_format, dyn_format = endian + 'IIIIIIII', endian + 'iI'
+        f.seek(phoff)
+        table = f.read(phentsize * phnum)
+        loads, dynamic = [], None
+        for i in range(phnum):
+            fields = struct.unpack_from(ph_format, table, i * phentsize)
+            # 64 位: type, flags, offset, vaddr, paddr, filesz, ...；32 位: type, offset, vaddr, paddr, filesz, ...
+            p_type, offset, vaddr, filesz = (fields[0], fields[2], fields[3], fields[5]) if is64 else fields[:3] + (fields[4],)
+            if p_type == PT_LOAD: loads.append((vaddr, offset, filesz))
+            elif p_type == PT_DYNAMIC: dynamic = (offset, filesz)
+        if dynamic is None: return None
+        f.seek(dynamic[0])
+        data = f.read(dynamic[1])
+        entry_size = struct.calcsize(dyn_format)
+        needed, paths, strtab = [], [], None
+        for i in range(len(data) // entry_size):
+            tag, value = struct.unpack_from(dyn_format, data, i * entry_size)
+            if tag == 0: break
+            if tag == DT_STRTAB: strtab = value
+            elif tag == DT_NEEDED: needed.append(value)
+            elif tag in (DT_RPATH, DT_RUNPATH): paths.append(value)
+        # DT_STRTAB 是虚拟地址，经所在的 PT_LOAD 段换算为文件偏移
+        base = next((offset + strtab - vaddr for vaddr, offset, filesz in loads if strtab is not None and vaddr <= strtab < vaddr + filesz), None)
+        if base is None: return None
+        def string(offset):
+            f.seek(base + offset)
+            chunk = f.read(4096)
+            return chunk[:chunk.find(b'\0')].decode('utf-8', 'replace')
+        origin = os.path.dirname(path)
+        search = [d.replace('$ORIGIN', origin).replace('${ORIGIN}', origin) for value in paths for d in string(value).split(':') if d]
+        return [string(value) for value in needed], search
+
+def _ld_so_conf(path='/etc/ld.so.conf', seen=None):
+    seen = seen if seen is not None else set()
+    dirs = []
+    if path in seen: return dirs
+    seen.add(path)
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f: lines = f.read().splitlines()
+    except OSError: return dirs
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if line.startswith('include '):
+            pattern = line[8:].strip()
+            if not os.path.isabs(pattern): pattern = os.path.join(os.path.dirname(path), pattern)
+            for included in sorted(glob.glob(pattern)): dirs.extend(_ld_so_conf(included, seen))
+        elif line: dirs.append(line)
+    return dirs
+
+class DependencyResolver:
+    """按 RUNPATH、LD_LIBRARY_PATH、ld.so.conf、默认目录的顺序解析依赖库，结果按 (路径, mtime) 缓存。"""
+    def __init__(self):
+        self._system_dirs = None
+        self._cache = {}
+
+    def system_dirs(self):
+        if self._system_dirs is None:
+            env_dirs = [d for d in os.environ.get('LD_LIBRARY_PATH', '').split(':') if d]
+            self._system_dirs = [d for d in dict.fromkeys(env_dirs + _ld_so_conf() + list(DEFAULT_LIB_DIRS)) if os.path.isdir(d)]
+        return self._system_dirs
+
+    def _direct(self, path):
+        try: stamp = os.stat(path).st_mtime_ns
+        except OSError: return ()
+        cached = self._cache.get(path)
+        if cached and cached[0] == stamp: return cached[1]
+        try: elf = read_elf(path)
+        except (OSError, struct.error): elf = None
+        libraries = []
+        if elf:
+            needed, search = elf
+            for name in needed:
+                if '/' in name:
+                    libraries.append(name)
+                    continue
+                found = next((os.path.join(d, name) for d in search + self.system_dirs() if os.path.isfile(os.path.join(d, name))), None)
+                if found: libraries.append(os.path.realpath(found))
+        self._cache[path] = (stamp, tuple(libraries))
+        return self._cache[path][1]
+
+    def closure(self, binary):
+        """返回程序本身及其全部（传递）依赖库的路径。脚本以 #! 指定的解释器代替。"""
+        files, pending = [], [binary]
+        try:
+            with open(binary, 'rb') as f: head = f.read(256)
+            if head.startswith(b'#!'):
+                interpreter = [arg.decode('utf-8', 'replace') for arg in head[2:].split(b'\n', 1)[0].split()]
+                # '#!/usr/bin/env python3' 真正运行的是 python3
+                if len(interpreter) > 1 and os.path.basename(interpreter[0]) == 'env':
+                    interpreter = [shutil.which(interpreter[1]) or interpreter[0]]
+                if interpreter:
+                    files.append(binary)
+                    pending = [os.path.realpath(interpreter[0])]
+        except OSError: return []
+        seen = set()
+        while pending:
+            path = pending.pop()
+            if path in seen: continue
+            seen.add(path)
+            files.append(path)
+            pending.extend(self._direct(path))
+        return files
+
+def fadvise_willneed(paths, max_bytes=MAX_BYTES):
+    """对文件发出 WILLNEED 预读提示，返回 (文件数, 字节数)。总量超过 max_bytes 后停止。"""
+    count = total = 0
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        except OSError: continue
+        try:
+            size = os.fstat(fd).st_size
+            if total + size > max_bytes: break
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            count, total = count + 1, total + size
+        except OSError: pass
+        finally: os.close(fd)
+    return count, total
+
+class Prewarmer:
+    def __init__(self):
+        self.resolver = DependencyResolver()
+        self._lock = threading.Condition()
+        self._pending = None
+        self._done = {}
+        self._thread = None
+        self.requests = 0
+        self.runs = 0
+        self.files = 0
+        self.bytes = 0
+        self.last_ms = 0.0
+
+    @property
+    def available(self):
+        return hasattr(os, 'posix_fadvise')
+
+    def request(self, key, exec_line):
+        """在 GUI 线程中调用：记下最新的悬停目标，由后台线程稍后处理。"""
+        if not self.available or not exec_line: return
+        with self._lock:
+            done = self._done.get(key)
+            if done and done[0] == exec_line and time.monotonic() - done[1] < REPEAT_AFTER: return
+            self.requests += 1
+            self._pending = (key, exec_line)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prewarm", daemon=True)
+                self._thread.start()
+            self._lock.notify()
+
+    def _run(self):
+        last = 0.0
+        while True:
+            with self._lock:
+                while self._pending is None: self._lock.wait()
+            # 限制频率：快速扫过一排格子时，只预热最后停留的那个
+            delay = MIN_INTERVAL - (time.monotonic() - last)
+            if delay > 0: time.sleep(delay)
+            with self._lock:
+                key, exec_line = self._pending
+                self._pending = None
+                self._done[key] = (exec_line, time.monotonic())
+            last = time.monotonic()
+            start = time.perf_counter()
+            try:
+                # 'python3 app.py' 这类 Exec 同时预热解释器及其依赖和脚本本身
+                program, script = proc_scan.exec_binary(exec_line, False), proc_scan.exec_binary(exec_line)
+                if program and program[0]:
+                    files = self.resolver.closure(program[0])
+                    if script and script[0] and script[0] not in files: files.append(script[0])
+                    count, size = fadvise_willneed(files)
+                    self.runs, self.files, self.bytes = self.runs + 1, self.files + count, self.bytes + size
+            except Exception as e: print(f"Error prewarming {exec_line}: {e}")
+            self.last_ms = (time.perf_counter() - start) * 1000
+
+    def stats(self):
+        return {'requests': self.requests, 'runs': self.runs, 'files': self.files,
+                'megabytes': round(self.bytes / 1048576, 1), 'last_ms': self.last_ms}
@@ -0,0 +1,154 @@
+"""
+检测格子里的应用是否已在运行（包括不是由物品栏启动的）。
+
+ProcessScanner 记住上次扫描时 /proc 中的 PID 集合，每次扫描只列一次 /proc 目录，
+仅对新出现的、属于当前用户的 PID 读取 exe 与 cmdline，并立即按各格子 Exec 解析出的程序建立的索引匹配；
+已消失的 PID 直接丢弃。格子变化时用已缓存的进程信息重新匹配，不必重新读取 /proc。
+activate() 借助 xdotool 或 wmctrl 切换到已在运行的应用窗口。本模块不依赖 Qt。
+"""
+import os
+import time
+import shutil
+import threading
+import subprocess
+
+import launcher
+
+# 这些程序只是包装器，真正的应用是紧随其后的参数
+WRAPPERS = {'env', 'nohup', 'setsid', 'exec'}
+# 解释器运行的应用以脚本区分；'sh -c ...' 这类无法确定具体程序的 Exec 不参与匹配
+INTERPRETERS = {'sh', 'bash', 'dash', 'zsh', 'python', 'python3', 'perl', 'ruby', 'node', 'java'}
+ACTIVATE_TIMEOUT = 1.0
+
+def exec_binary(exec_line, unwrap_interpreters=True):
+    """
+    返回 Exec 中实际运行的程序 (真实路径或 None, 文件名)；无法解析时返回 None。
+    unwrap_interpreters 为 False 时，解释器运行的脚本返回解释器本身。
+    """
+    try: tokens, _ = launcher.tokenize_exec(exec_line)
+    except ValueError: return None
+    interpreter = False
+    for token, _ in tokens:
+        if '=' in token and not token.startswith('/'): continue
+        if token == '-c' and interpreter: return None
+        name = os.path.basename(token)
+        if name in WRAPPERS or token.startswith('-'): continue
+        if unwrap_interpreters and not interpreter and name.rstrip('0123456789.') in INTERPRETERS:
+            interpreter = True
+            continue
+        path = shutil.which(token) if not interpreter else (token if os.path.isfile(token) else None)
+        return (os.path.realpath(path) if path else None), name
+    return None
+
+class ProcessScanner:
+    def __init__(self, proc_dir='/proc'):
+        self.proc_dir = proc_dir
+        self.uid = os.getuid()
+        self.own_pid = os.getpid()
+        self._lock = threading.Lock()
+        # PID -> (路径集合, 程序名)；不属于当前用户或没有 cmdline 的进程记为 None，同样不再读取
+        self._processes = {}
+        self._matches = {}
+        self._targets = {}
+        self._by_path = {}
+        self._by_name = {}
+        self.scans = 0
+        self.reads = 0
+
+    @property
+    def available(self):
+        return os.path.isdir(self.proc_dir)
+
+    def set_targets(self, targets):
+        """targets: {键: Exec}。与上次相同时什么都不做。"""
+        with self._lock:
+            if targets == self._targets: return
+            self._targets = dict(targets)
+            self._by_path, self._by_name = {}, {}
+            for key, exec_line in targets.items():
+                binary = exec_binary(exec_line) if exec_line else None
+                if binary is None: continue
+                path, name = binary
+                if path: self._by_path.setdefault(path, set()).add(key)
+                self._by_name.setdefault(name, set()).add(key)
+            self._matches = {}
+            for pid, identity in self._processes.items(): self._match(pid, identity)
+
+    def _identify(self, pid):
+        base = os.path.join(self.proc_dir, str(pid))
+        try:
+            if os.stat(base).st_uid != self.uid: return None
+            with open(os.path.join(base, 'cmdline'), 'rb') as f: argv = f.read().split(b'\0')
+        except OSError: return None
+        self.reads += 1
+        if not argv or not argv[0]: return None
+        argv = [arg.decode('utf-8', 'replace') for arg in argv[:2]]
+        paths = set()
+        try:
+            exe = os.readlink(os.path.join(base, 'exe'))
+            paths.add(exe[:-len(' (deleted)')] if exe.endswith(' (deleted)') else exe)
+        except OSError: pass
+        # 脚本的 exe 是解释器，脚本本身出现在 cmdline 中
+        for arg in argv:
+            if arg.startswith('/'): paths.add(os.path.realpath(arg))
+        return frozenset(paths), os.path.basename(argv[0])
+
+    def _match(self, pid, identity):
+        if identity is None: return
+        paths, name = identity
+        keys = set(self._by_name.get(name, ()))
+        for path in paths: keys.update(self._by_path.get(path, ()))
+        if keys: self._matches[pid] = keys
+
+    def scan(self):
+        """返回 {键: [PID, ...]}，只包含有进程在运行的键。"""
+        try: pids = {int(name) for name in os.listdir(self.proc_dir) if name.isdigit()}
+        except OSError: return {}
+        pids.discard(self.own_pid)
+        with self._lock:
+            self.scans += 1
+            for pid in self._processes.keys() - pids:
+                del self._processes[pid]
+                self._matches.pop(pid, None)
+            for pid in pids - self._processes.keys():
+                identity = self._processes[pid] = self._identify(pid)
+                self._match(pid, identity)
+            running = {}
+            for pid, keys in self._matches.items():
+                for key in keys: running.setdefault(key, []).append(pid)
+        for key_pids in running.values(): key_pids.sort()
+        return running
+
+    def stats(self):
+        with self._lock:
+            return {'scans': self.scans, 'reads': self.reads, 'processes': len(self._processes),
+                    'matched': len(self._matches), 'targets': len(self._targets)}
+
+def _run(argv, timeout):
+    try: return subprocess.run(argv, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError): return None
+
+def activate(pids, timeout=ACTIVATE_TIMEOUT):
+    """
+    把 pids 中某个进程的窗口切换到前台，成功时返回 True。需要 xdotool 或 wmctrl（仅 X11）。
+    会等待外部程序，应在后台线程中调用；全部尝试共用 timeout 秒。
+    """
+    deadline = time.monotonic() + timeout
+    if shutil.which('xdotool'):
+        for pid in pids:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0: break
+            result = _run(['xdotool', 'search', '--onlyvisible', '--pid', str(pid), 'windowactivate'], remaining)
+            if result and result.returncode == 0: return True
+    elif shutil.which('wmctrl'):
+        result = _run(['wmctrl', '-lp'], timeout)
+        if not result or result.returncode: return False
+        wanted = {str(pid) for pid in pids}
+        for line in result.stdout.splitlines():
+            fields = line.split(None, 3)
+            if len(fields) >= 3 and fields[2] in wanted:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return False
+                result = _run(['wmctrl', '-i', '-a', fields[0]], remaining)
+                return bool(result) and result.returncode == 0
+    return False